@@ -6,7 +6,7 @@
 import logging
 import time
 from contextlib import contextmanager
-from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy import create_engine, event, exc, inspect, text
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.pool import QueuePool
 from models import Base
@@ -17,7 +17,8 @@ logger = logging.getLogger(__name__)
 class DatabaseManager:
     """数据库管理类"""
     
-    def __init__(self, database_uri, pool_size=10, max_overflow=20, pool_timeout=30, pool_recycle=3600):
+    def __init__(self, database_uri, pool_size=10, max_overflow=20, pool_timeout=30, pool_recycle=3600,
+                 echo_pool=False, engine_options=None):
         """
         初始化数据库管理器
         
@@ -27,6 +28,9 @@ class DatabaseManager:
             max_overflow: 连接池最大溢出数
             pool_timeout: 连接超时时间（秒）
             pool_recycle: 连接回收时间（秒）
+            echo_pool: 连接池日志（False, True 或 'debug'）
+            engine_options: 传给create_engine的额外参数，
+                            指定poolclass时（如测试使用的StaticPool）不再使用QueuePool的大小参数
         """
         self.database_uri = database_uri
         self.engine = None
@@ -36,6 +40,8 @@ class DatabaseManager:
         self.max_overflow = max_overflow
         self.pool_timeout = pool_timeout
         self.pool_recycle = pool_recycle
+        self.echo_pool = echo_pool
+        self.engine_options = engine_options or {}
         self._is_connected = False
     
     def connect(self, max_retries=3, retry_delay=5):
@@ -56,13 +62,9 @@ class DatabaseManager:
                 # 创建引擎，配置连接池
                 self.engine = create_engine(
                     self.database_uri,
-                    poolclass=QueuePool,
-                    pool_size=self.pool_size,
-                    max_overflow=self.max_overflow,
-                    pool_timeout=self.pool_timeout,
-                    pool_recycle=self.pool_recycle,
-                    pool_pre_ping=True,  # 启用连接健康检查
-                    echo=False
+                    echo=False,
+                    echo_pool=self.echo_pool,
+                    **self._engine_kwargs()
                 )
                 
                 # 添加连接事件监听器
@@ -91,6 +93,22 @@ class DatabaseManager:
         
         return False
     
+    def _engine_kwargs(self):
+        """合并连接池参数与额外的引擎参数"""
+        if 'poolclass' in self.engine_options:
+            return dict(self.engine_options)
+        
+        kwargs = {
+            'poolclass': QueuePool,
+            'pool_size': self.pool_size,
+            'max_overflow': self.max_overflow,
+            'pool_timeout': self.pool_timeout,
+            'pool_recycle': self.pool_recycle,
+            'pool_pre_ping': True,  # 启用连接健康检查
+        }
+        kwargs.update(self.engine_options)
+        return kwargs
+    
     def _setup_event_listeners(self):
         """设置数据库事件监听器"""
         
@@ -177,12 +195,31 @@ class DatabaseManager:
         try:
             logger.info("正在创建数据表...")
             Base.metadata.create_all(self.engine)
+            self.create_missing_indexes()
             logger.info("数据表创建成功")
             return True
         except Exception as e:
             logger.error(f"创建数据表失败: {e}")
             return False
     
+    def create_missing_indexes(self):
+        """
+        为已存在的表补建模型中新增的索引
+        create_all只创建缺失的表，不会为已有表添加索引
+        """
+        inspector = inspect(self.engine)
+        existing_tables = set(inspector.get_table_names())
+        
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            
+            existing_indexes = {index['name'] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    logger.info(f"正在创建索引: {table.name}.{index.name}")
+                    index.create(self.engine)
+    
     def drop_tables(self):
         """删除所有数据表（谨慎使用）"""
         try:
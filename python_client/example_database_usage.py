@@ -189,7 +189,6 @@ def example_update_threshold(db_manager):
             old_value = threshold.threshold_value
             threshold.threshold_value = 3.5
             threshold.updated_by = 'admin'
-            threshold.updated_at = datetime.utcnow()
             logger.info(f"更新阈值: {old_value} -> {threshold.threshold_value}")
 
 
@@ -6,7 +6,7 @@
 from datetime import datetime
 from sqlalchemy import (
     Column, Integer, BigInteger, String, DateTime, 
-    Boolean, Text, Index, create_engine
+    Boolean, Text, Index, create_engine, func
 )
 from sqlalchemy.types import Numeric as Decimal
 from sqlalchemy.ext.declarative import declarative_base
@@ -17,6 +17,21 @@ import bcrypt
 Base = declarative_base()
 
 
+def check_password_hash(password_hash, password):
+    """
+    验证密码与bcrypt哈希是否匹配
+    模块级函数，可提交到进程池中执行
+    
+    Args:
+        password_hash: bcrypt哈希字符串
+        password: 明文密码
+    
+    Returns:
+        bool: 密码是否正确
+    """
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+
+
 class EnergyData(Base):
     """能源数据表模型"""
     __tablename__ = 'energy_data'
@@ -148,7 +163,7 @@ class User(Base):
     
     def check_password(self, password):
         """验证密码"""
-        return bcrypt.checkpw(password.encode('utf-8'), self.password_hash.encode('utf-8'))
+        return check_password_hash(self.password_hash, password)
     
     def is_locked(self):
         """检查账户是否被锁定"""
@@ -179,11 +194,18 @@ class Threshold(Base):
     alarm_level = Column(String(20))  # warning, critical, emergency
     enabled = Column(Boolean, default=True)
     updated_by = Column(String(50))
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 更新时间由数据库生成：server_default用于建表DDL，default让已有表的INSERT也使用数据库时间
+    updated_at = Column(DateTime, default=func.now(), server_default=func.now(), onupdate=func.now())
     
-    # 创建唯一约束
+    # 创建唯一约束和索引
     __table_args__ = (
         Index('uk_device_param', 'device_id', 'parameter_name', unique=True),
+        # 启用阈值查询索引：PostgreSQL/SQLite上为部分索引，MySQL不支持部分索引时为普通复合索引
+        Index(
+            'idx_threshold_enabled_device', 'enabled', 'device_id',
+            postgresql_where=enabled == True,
+            sqlite_where=enabled == True
+        ),
     )
     
     def __repr__(self):
@@ -129,8 +129,7 @@ def seed_thresholds(session):
                 threshold_value=threshold_data['threshold_value'],
                 alarm_level=threshold_data['alarm_level'],
                 enabled=threshold_data['enabled'],
-                updated_by='system',
-                updated_at=datetime.utcnow()
+                updated_by='system'
             )
             session.add(threshold)
             created_count += 1
@@ -63,7 +63,15 @@ def create_app(config_object=None):
         raise ValueError("Database URI not configured")
     
     app.logger.debug(f"数据库URI: {db_uri.split('@')[-1] if '@' in db_uri else db_uri}")  # 隐藏密码
-    db_manager = DatabaseManager(db_uri)
+    db_manager = DatabaseManager(
+        db_uri,
+        pool_size=app.config.get('DB_POOL_SIZE', 20),
+        max_overflow=app.config.get('DB_MAX_OVERFLOW', 10),
+        pool_timeout=app.config.get('DB_POOL_TIMEOUT', 30),
+        pool_recycle=app.config.get('DB_POOL_RECYCLE', 3600),
+        echo_pool='debug' if app.config.get('DB_ECHO_POOL', False) else False,
+        engine_options=app.config.get('SQLALCHEMY_ENGINE_OPTIONS')
+    )
     if not db_manager.connect():
         app.logger.error("数据库连接失败，请检查数据库配置和服务状态")
     else:
@@ -72,6 +80,18 @@ def create_app(config_object=None):
     # 将数据库管理器存储到app上下文
     app.db_manager = db_manager
     
+    # 启用orjson序列化（可选）
+    from json_provider import init_json_provider
+    init_json_provider(app)
+    
+    # 初始化Redis缓存（可选）
+    from routes.cache import init_redis
+    app.redis = init_redis(app)
+    
+    # 初始化服务端会话存储（可选，依赖Redis）
+    from session_store import init_session_store
+    init_session_store(app)
+    
     # 注册蓝图
     app.logger.info("注册应用蓝图...")
     register_blueprints(app)
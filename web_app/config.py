@@ -36,6 +36,13 @@ class Config:
             return f'mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}'
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # 数据库连接池配置（应用启动时创建一次，所有请求共享）
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '20'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))  # 获取连接超时（秒）
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '3600'))  # 连接回收时间（秒）
+    DB_ECHO_POOL = os.getenv('DB_ECHO_POOL', 'False').lower() == 'true'  # 记录连接池检出/归还日志
     SQLALCHEMY_ECHO = os.getenv('SQLALCHEMY_ECHO', 'False').lower() == 'true'
     
     # 会话配置
@@ -43,14 +50,22 @@ class Config:
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     PERMANENT_SESSION_LIFETIME = int(os.getenv('SESSION_LIFETIME', '1800'))  # 30分钟
+    SESSION_REFRESH_EACH_REQUEST = False  # 仅在会话内容变化时重新下发Cookie
+    SESSION_STORE = os.getenv('SESSION_STORE', 'cookie')  # cookie或redis（redis需配置REDIS_URL）
     
     # 用户认证配置
     MAX_LOGIN_ATTEMPTS = int(os.getenv('MAX_LOGIN_ATTEMPTS', '3'))
     ACCOUNT_LOCK_DURATION = int(os.getenv('ACCOUNT_LOCK_DURATION', '600'))  # 10分钟（秒）
+    PASSWORD_CHECK_WORKERS = int(os.getenv('PASSWORD_CHECK_WORKERS', '0'))  # 密码验证进程数，0为在请求线程中验证
     
     # API配置
     API_RATE_LIMIT = os.getenv('API_RATE_LIMIT', '100 per minute')
     
+    # Redis缓存配置（留空则禁用响应缓存）
+    REDIS_URL = os.getenv('REDIS_URL', '')
+    CACHE_STALE_TTL = int(os.getenv('CACHE_STALE_TTL', '3600'))  # 数据库不可用时的过期缓存保留时间（秒）
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '60'))  # 登录状态缓存时间（秒）
+    
     # 数据刷新配置
     REALTIME_UPDATE_INTERVAL = int(os.getenv('REALTIME_UPDATE_INTERVAL', '2'))  # 前端刷新间隔（秒）
     
@@ -0,0 +1,174 @@
+"""
+pytest公共配置
+提供整个测试会话共享的Flask应用和测试客户端fixture
+"""
+
+import fnmatch
+import os
+import sys
+from contextlib import contextmanager
+
+import pytest
+
+# 添加web_app和python_client到路径（pytest在导入测试模块前加载conftest.py，只需设置一次）
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_client'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 测试用户: (用户名, 密码, 角色, 密码哈希)
+# 密码哈希预先计算（bcrypt成本因子4），写入时无需哈希，登录验证也更快
+TEST_USERS = (
+    ('admin', 'admin123', 'admin', '$2b$04$zFFkRfnE1M2pD7tcccbimeAuEQloIXbKxi4Ln5i.rh5zcIvKOTQTm'),
+    ('user', 'user123', 'user', '$2b$04$860J49dyJa5LXygEsQLj4uzYfVjaDO/CoRLCJNkJ/58tPdh.LmZlG'),
+)
+
+
+class FakeRedis:
+    """模拟Redis客户端（仅实现缓存模块用到的命令）"""
+    
+    def __init__(self):
+        self.store = {}
+    
+    def hgetall(self, key):
+        return dict(self.store.get(key, {}))
+    
+    def hset(self, key, mapping):
+        self.store[key] = {
+            k.encode('utf-8'): v if isinstance(v, bytes) else str(v).encode('utf-8')
+            for k, v in mapping.items()
+        }
+    
+    def expire(self, key, ttl):
+        pass
+    
+    def scan_iter(self, pattern):
+        return [k for k in list(self.store) if fnmatch.fnmatch(k, pattern)]
+    
+    def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+def pytest_configure(config):
+    """注册自定义标记"""
+    config.addinivalue_line(
+        'markers', 'slow: 耗时或会修改共享状态的测试，快速开发循环中可用 -m "not slow" 跳过'
+    )
+    config.addinivalue_line(
+        'markers', 'integration: 访问真实数据库的端到端测试，可用 -m "not integration" 跳过'
+    )
+    # xdist_group由pytest-xdist注册，未安装时在此注册以避免未知标记警告
+    if not config.pluginmanager.hasplugin('xdist'):
+        config.addinivalue_line(
+            'markers', 'xdist_group(name): 使用 --dist loadgroup 时同组测试在同一工作进程中运行'
+        )
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """
+    Flask应用实例（每个工作进程只创建一次）
+    数据库和日志文件放在pytest为本次运行创建的临时目录中，
+    pytest-xdist的每个工作进程使用各自的临时目录，并行运行时互不影响
+    """
+    from app import create_app, web_config
+    
+    tmp_dir = tmp_path_factory.mktemp('web_app')
+    
+    class TestConfig(web_config.Config):
+        TESTING = True
+        DB_TYPE = 'sqlite'
+        SQLITE_DB_PATH = str(tmp_dir / 'test.db')
+        LOG_FILE = str(tmp_dir / 'test_web_app.log')
+        PASSWORD_CHECK_WORKERS = 0  # 在请求线程中验证密码，测试中不启动进程池
+        REDIS_URL = ''
+        SESSION_STORE = 'cookie'
+    
+    flask_app = create_app(TestConfig)
+    flask_app.db_manager.create_tables()
+    yield flask_app
+    
+    flask_app.db_manager.disconnect()
+
+
+@pytest.fixture(scope='session')
+def seed_users(app):
+    """写入测试用户（每个工作进程只写入一次）"""
+    from models import User
+    
+    with app.db_manager.get_session() as db_session:
+        db_session.add_all([
+            User(username=username, role=role, password_hash=password_hash, failed_login_attempts=0)
+            for username, _, role, password_hash in TEST_USERS
+        ])
+
+
+@pytest.fixture
+def mock_user_db(app, mocker):
+    """
+    模拟登录时的用户查询，认证测试不访问数据库
+    每个测试使用新的用户对象，失败计数和锁定状态互不影响
+    """
+    from models import User
+    
+    users = {
+        username: User(
+            id=index,
+            username=username,
+            role=role,
+            password_hash=password_hash,
+            failed_login_attempts=0
+        )
+        for index, (username, _, role, password_hash) in enumerate(TEST_USERS, start=1)
+    }
+    
+    def filter_users(criterion):
+        # 登录查询的条件为 User.username == username
+        query = mocker.Mock()
+        query.first.return_value = users.get(criterion.right.value)
+        return query
+    
+    db_session = mocker.MagicMock()
+    db_session.query.return_value.filter.side_effect = filter_users
+    
+    @contextmanager
+    def get_session():
+        yield db_session
+    
+    mocker.patch.object(app.db_manager, 'get_session', get_session)
+    return users
+
+
+@pytest.fixture
+def fake_redis():
+    """内存中的模拟Redis客户端（每个测试独立）"""
+    return FakeRedis()
+
+
+@pytest.fixture
+def client(app, seed_users):
+    """测试客户端（每个测试使用独立的Cookie）"""
+    with app.test_client() as test_client:
+        yield test_client
+
+
+def _logged_in_client(app, username, password):
+    """
+    创建测试客户端并登录，登录后的会话Cookie保存在客户端中
+    跨测试共享的客户端不使用with语句，避免保留的请求上下文影响其他测试
+    """
+    test_client = app.test_client()
+    response = test_client.post('/auth/login', json={'username': username, 'password': password})
+    assert response.status_code == 200, f"测试用户 {username} 登录失败: {response.status_code}"
+    return test_client
+
+
+@pytest.fixture(scope='session')
+def admin_client(app, seed_users):
+    """已登录的管理员测试客户端（整个测试会话只登录一次）"""
+    return _logged_in_client(app, 'admin', 'admin123')
+
+
+@pytest.fixture(scope='session')
+def user_client(app, seed_users):
+    """已登录的普通用户测试客户端（整个测试会话只登录一次）"""
+    return _logged_in_client(app, 'user', 'user123')
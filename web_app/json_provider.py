@@ -0,0 +1,58 @@
+"""
+JSON序列化模块
+使用orjson（C实现）替代标准库json，加快列表类API响应的序列化
+未安装orjson时保持Flask默认的JSON处理
+"""
+
+from flask.json.provider import JSONProvider, _default
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时使用Flask默认实现
+    orjson = None
+
+
+class ORJSONProvider(JSONProvider):
+    """
+    基于orjson的JSON提供者
+    
+    输出与Flask默认实现保持一致：
+        - 键排序
+        - datetime/date序列化为HTTP日期格式
+        - Decimal、UUID等通过Flask默认转换函数处理
+    """
+    
+    # 日期时间交给Flask默认转换函数处理，保持原有输出格式
+    option = 0 if orjson is None else (
+        orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+    
+    def dumps(self, obj, **kwargs):
+        """序列化为JSON字符串（忽略标准库json的参数）"""
+        return orjson.dumps(obj, default=_default, option=self.option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        """解析JSON字符串或字节串"""
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        """直接使用orjson输出的字节串构建响应，避免额外的编码转换"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=_default, option=self.option),
+            mimetype='application/json'
+        )
+
+
+def init_json_provider(app):
+    """
+    已安装orjson时为应用启用ORJSONProvider
+    
+    Args:
+        app: Flask应用实例
+    """
+    if orjson is None:
+        app.logger.info("未安装orjson，使用默认JSON序列化")
+        return
+    
+    app.json = ORJSONProvider(app)
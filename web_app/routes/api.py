@@ -3,12 +3,148 @@ API路由模块
 提供RESTful API端点用于数据查询和操作
 """
 
-from flask import Blueprint, jsonify, request, current_app
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import chain
+from datetime import datetime, timedelta
+from typing import Optional
+from flask import Blueprint, jsonify, request, current_app, session, stream_with_context
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.exc import IntegrityError
 from .auth import login_required, admin_required
+from .cache import cached, invalidate_cache
+from models import EnergyData, ProductionData, Alarm, Threshold
 
 # 创建API蓝图
 api_bp = Blueprint('api', __name__)
 
+# 允许的报警级别
+ALARM_LEVELS = frozenset(('warning', 'critical', 'emergency'))
+
+# 批量创建阈值时单次请求的最大记录数
+THRESHOLD_BATCH_LIMIT = 1000
+
+# 阈值列表流式输出时每次从数据库读取的行数
+THRESHOLD_STREAM_CHUNK_SIZE = 500
+
+# OEE统计维度 -> 时间分组格式（MySQL DATE_FORMAT）
+OEE_DIMENSION_FORMATS = {
+    'day': '%Y-%m-%d',
+    'week': '%Y-%u',
+    'month': '%Y-%m'
+}
+
+# SQLite没有DATE_FORMAT，使用strftime；%W与MySQL的%u一样以周一为每周第一天
+OEE_SQLITE_DIMENSION_FORMATS = {
+    'day': '%Y-%m-%d',
+    'week': '%Y-%W',
+    'month': '%Y-%m'
+}
+
+
+class QueryParamError(ValueError):
+    """查询参数或请求体字段无效，对应HTTP 400响应"""
+    
+    def __init__(self, error, message=None):
+        super().__init__(message or error)
+        self.error = error
+        self.message = message
+
+
+def parse_iso_datetime(value, error):
+    """
+    解析ISO格式时间字符串
+    
+    Args:
+        value: 时间字符串，为空时返回None
+        error: 解析失败时的错误描述
+    
+    Returns:
+        datetime或None
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise QueryParamError(error, '请使用ISO格式，例如: 2025-12-01T10:00:00')
+
+
+def parse_bool_arg(value):
+    """解析true/false查询参数，其他值视为未指定"""
+    if value:
+        value = value.lower()
+        if value == 'true':
+            return True
+        if value == 'false':
+            return False
+    return None
+
+
+@dataclass
+class HistoryQuery:
+    """
+    时间范围和分页查询参数
+    每个请求解析一次，替代各端点重复的参数校验代码
+    """
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    page: int = 1
+    page_size: int = 100
+    
+    @classmethod
+    def from_args(cls, args, default_page_size=100, max_page_size=1000, paginated=True):
+        """
+        从请求参数构建查询对象
+        
+        Args:
+            args: request.args
+            default_page_size: 默认每页记录数
+            max_page_size: 每页记录数上限，超出时使用默认值
+            paginated: 是否解析分页参数
+        
+        Returns:
+            HistoryQuery: 解析后的查询参数
+        
+        Raises:
+            QueryParamError: 参数格式无效
+        """
+        query = cls(
+            start_time=parse_iso_datetime(args.get('start_time'), '无效的开始时间格式'),
+            end_time=parse_iso_datetime(args.get('end_time'), '无效的结束时间格式'),
+            page_size=default_page_size
+        )
+        
+        if paginated:
+            try:
+                page = int(args.get('page', 1))
+                page_size = int(args.get('page_size', default_page_size))
+            except ValueError as e:
+                raise QueryParamError('参数错误', str(e))
+            
+            # 验证分页参数
+            query.page = page if page >= 1 else 1
+            if 1 <= page_size <= max_page_size:
+                query.page_size = page_size
+        
+        return query
+    
+    @property
+    def offset(self):
+        """分页偏移量"""
+        return (self.page - 1) * self.page_size
+
+
+def query_param_error_response(e):
+    """将QueryParamError转换为400响应"""
+    body = {
+        'success': False,
+        'error': e.error
+    }
+    if e.message:
+        body['message'] = e.message
+    return jsonify(body), 400
+
 
 @api_bp.route('/devices', methods=['GET'])
 @login_required
@@ -70,11 +206,8 @@ def get_device_current(device_id):
         db_manager = current_app.db_manager
         
         # 查询该设备最新的能源数据
-        from datetime import datetime, timedelta
         
         with db_manager.get_session() as session:
-            from models import EnergyData
-            
             # 获取最近1分钟内的最新数据
             time_threshold = datetime.utcnow() - timedelta(minutes=1)
             latest_data = session.query(EnergyData).filter(
@@ -125,52 +258,21 @@ def get_device_history(device_id):
     try:
         current_app.logger.info(f"API: 获取设备历史数据 - {device_id}")
         
-        # 获取查询参数
-        start_time_str = request.args.get('start_time')
-        end_time_str = request.args.get('end_time')
-        page = int(request.args.get('page', 1))
-        page_size = int(request.args.get('page_size', 100))
-        
-        # 验证分页参数
-        if page < 1:
-            page = 1
-        if page_size < 1 or page_size > 1000:
-            page_size = 100
-        
-        # 解析时间参数
-        from datetime import datetime
-        start_time = None
-        end_time = None
-        
-        if start_time_str:
-            try:
-                start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': '无效的开始时间格式',
-                    'message': '请使用ISO格式，例如: 2025-12-01T10:00:00'
-                }), 400
-        
-        if end_time_str:
-            try:
-                end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': '无效的结束时间格式',
-                    'message': '请使用ISO格式，例如: 2025-12-01T10:00:00'
-                }), 400
+        # 解析查询参数
+        try:
+            q = HistoryQuery.from_args(request.args)
+        except QueryParamError as e:
+            return query_param_error_response(e)
         
         # 使用DatabaseManager的query_history方法查询数据
         db_manager = current_app.db_manager
         result = db_manager.query_history(
             table_name='energy_data',
-            start_time=start_time,
-            end_time=end_time,
+            start_time=q.start_time,
+            end_time=q.end_time,
             device_id=device_id,
-            page=page,
-            page_size=page_size
+            page=q.page,
+            page_size=q.page_size
         )
         
         if result is None:
@@ -191,13 +293,6 @@ def get_device_history(device_id):
             }
         }), 200
         
-    except ValueError as e:
-        current_app.logger.error(f"参数错误: {e}")
-        return jsonify({
-            'success': False,
-            'error': '参数错误',
-            'message': str(e)
-        }), 400
     except Exception as e:
         current_app.logger.error(f"获取设备历史数据失败: {e}")
         return jsonify({
@@ -225,8 +320,6 @@ def get_energy_summary():
         current_app.logger.info("API: 获取能耗汇总")
         
         # 获取查询参数
-        start_time_str = request.args.get('start_time')
-        end_time_str = request.args.get('end_time')
         device_id = request.args.get('device_id')
         aggregate = request.args.get('aggregate', 'sum')
         interval = request.args.get('interval')
@@ -249,27 +342,12 @@ def get_energy_summary():
             }), 400
         
         # 解析时间参数
-        from datetime import datetime, timedelta
-        start_time = None
-        end_time = None
-        
-        if start_time_str:
-            try:
-                start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': '无效的开始时间格式'
-                }), 400
-        
-        if end_time_str:
-            try:
-                end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': '无效的结束时间格式'
-                }), 400
+        try:
+            q = HistoryQuery.from_args(request.args, paginated=False)
+        except QueryParamError as e:
+            return query_param_error_response(e)
+        start_time = q.start_time
+        end_time = q.end_time
         
         # 如果没有指定时间范围，默认查询最近24小时
         if not start_time and not end_time:
@@ -307,9 +385,6 @@ def get_energy_summary():
         
         # 否则，查询原始数据并计算汇总
         with db_manager.get_session() as session:
-            from models import EnergyData
-            from sqlalchemy import func
-            
             # 构建查询
             query = session.query(
                 EnergyData.device_id,
@@ -397,7 +472,6 @@ def get_energy_summary():
                 trend_records = trend_query.all()
                 
                 # 按时间戳分组数据
-                from collections import defaultdict
                 time_grouped = defaultdict(dict)
                 
                 for record in trend_records:
@@ -437,6 +511,22 @@ def get_energy_summary():
         }), 500
 
 
+def oee_period_expression(dialect_name, dimension):
+    """
+    按数据库方言构建OEE统计的时间分组表达式
+    
+    Args:
+        dialect_name: 数据库方言名称（mysql或sqlite）
+        dimension: 统计维度（day, week, month）
+    
+    Returns:
+        SQL表达式，结果为分组周期字符串，例如 '2024-01'
+    """
+    if dialect_name == 'sqlite':
+        return func.strftime(OEE_SQLITE_DIMENSION_FORMATS[dimension], ProductionData.timestamp)
+    return func.date_format(ProductionData.timestamp, OEE_DIMENSION_FORMATS[dimension])
+
+
 @api_bp.route('/oee', methods=['GET'])
 @login_required
 def get_oee():
@@ -455,48 +545,25 @@ def get_oee():
         current_app.logger.info("API: 获取OEE数据")
         
         # 获取查询参数
-        start_time_str = request.args.get('start_time')
-        end_time_str = request.args.get('end_time')
         dimension = request.args.get('dimension', 'day')
-        page = int(request.args.get('page', 1))
-        page_size = int(request.args.get('page_size', 100))
         
         # 验证维度参数
-        if dimension not in ['day', 'week', 'month']:
+        if dimension not in OEE_DIMENSION_FORMATS:
             return jsonify({
                 'success': False,
                 'error': '无效的统计维度',
                 'message': '统计维度必须是: day, week, month'
             }), 400
         
-        # 验证分页参数
-        if page < 1:
-            page = 1
-        if page_size < 1 or page_size > 1000:
-            page_size = 100
-        
-        # 解析时间参数
-        from datetime import datetime, timedelta
-        start_time = None
-        end_time = None
-        
-        if start_time_str:
-            try:
-                start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': '无效的开始时间格式'
-                }), 400
-        
-        if end_time_str:
-            try:
-                end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': '无效的结束时间格式'
-                }), 400
+        # 解析时间和分页参数
+        try:
+            q = HistoryQuery.from_args(request.args)
+        except QueryParamError as e:
+            return query_param_error_response(e)
+        start_time = q.start_time
+        end_time = q.end_time
+        page = q.page
+        page_size = q.page_size
         
         # 如果没有指定时间范围，默认查询最近7天
         if not start_time and not end_time:
@@ -506,9 +573,6 @@ def get_oee():
         db_manager = current_app.db_manager
         
         with db_manager.get_session() as session:
-            from models import ProductionData
-            from sqlalchemy import func
-            
             # 构建基础查询
             query = session.query(ProductionData)
             
@@ -519,12 +583,7 @@ def get_oee():
                 query = query.filter(ProductionData.timestamp <= end_time)
             
             # 根据维度进行聚合
-            if dimension == 'day':
-                time_group = func.date_format(ProductionData.timestamp, '%Y-%m-%d')
-            elif dimension == 'week':
-                time_group = func.date_format(ProductionData.timestamp, '%Y-%u')
-            elif dimension == 'month':
-                time_group = func.date_format(ProductionData.timestamp, '%Y-%m')
+            time_group = oee_period_expression(session.get_bind().dialect.name, dimension)
             
             # 聚合查询
             agg_query = session.query(
@@ -552,7 +611,7 @@ def get_oee():
             total = agg_query.count()
             
             # 分页
-            offset = (page - 1) * page_size
+            offset = q.offset
             agg_query = agg_query.limit(page_size).offset(offset)
             
             # 执行查询
@@ -649,63 +708,29 @@ def get_alarms():
         # 获取查询参数
         device_id = request.args.get('device_id')
         alarm_level = request.args.get('alarm_level')
-        acknowledged_str = request.args.get('acknowledged')
-        start_time_str = request.args.get('start_time')
-        end_time_str = request.args.get('end_time')
-        page = int(request.args.get('page', 1))
-        page_size = int(request.args.get('page_size', 50))
-        
-        # 验证分页参数
-        if page < 1:
-            page = 1
-        if page_size < 1 or page_size > 500:
-            page_size = 50
+        acknowledged = parse_bool_arg(request.args.get('acknowledged'))
         
         # 验证报警级别
-        if alarm_level and alarm_level not in ['warning', 'critical', 'emergency']:
+        if alarm_level and alarm_level not in ALARM_LEVELS:
             return jsonify({
                 'success': False,
                 'error': '无效的报警级别',
                 'message': '报警级别必须是: warning, critical, emergency'
             }), 400
         
-        # 解析acknowledged参数
-        acknowledged = None
-        if acknowledged_str:
-            if acknowledged_str.lower() == 'true':
-                acknowledged = True
-            elif acknowledged_str.lower() == 'false':
-                acknowledged = False
-        
-        # 解析时间参数
-        from datetime import datetime
-        start_time = None
-        end_time = None
-        
-        if start_time_str:
-            try:
-                start_time = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': '无效的开始时间格式'
-                }), 400
-        
-        if end_time_str:
-            try:
-                end_time = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
-            except ValueError:
-                return jsonify({
-                    'success': False,
-                    'error': '无效的结束时间格式'
-                }), 400
+        # 解析时间和分页参数
+        try:
+            q = HistoryQuery.from_args(request.args, default_page_size=50, max_page_size=500)
+        except QueryParamError as e:
+            return query_param_error_response(e)
+        start_time = q.start_time
+        end_time = q.end_time
+        page = q.page
+        page_size = q.page_size
         
         db_manager = current_app.db_manager
         
         with db_manager.get_session() as session:
-            from models import Alarm
-            from sqlalchemy import func
-            
             # 构建查询
             query = session.query(Alarm)
             
@@ -726,7 +751,7 @@ def get_alarms():
             
             # 排序和分页
             query = query.order_by(Alarm.timestamp.desc())
-            offset = (page - 1) * page_size
+            offset = q.offset
             query = query.limit(page_size).offset(offset)
             
             # 执行查询
@@ -815,15 +840,11 @@ def acknowledge_alarm(alarm_id):
         current_app.logger.info(f"API: 确认报警 - {alarm_id}")
         
         # 获取当前用户信息
-        from flask import session
         username = session.get('username', 'unknown')
         
         db_manager = current_app.db_manager
         
         with db_manager.get_session() as db_session:
-            from models import Alarm
-            from datetime import datetime
-            
             # 查询报警记录
             alarm = db_session.query(Alarm).filter(Alarm.id == alarm_id).first()
             
@@ -866,8 +887,67 @@ def acknowledge_alarm(alarm_id):
         }), 500
 
 
+# 阈值列表及更新结果返回的列（与Threshold.to_dict()字段一致）
+THRESHOLD_COLUMNS = (
+    Threshold.id,
+    Threshold.device_id,
+    Threshold.parameter_name,
+    Threshold.threshold_value,
+    Threshold.alarm_level,
+    Threshold.enabled,
+    Threshold.updated_by,
+    Threshold.updated_at
+)
+
+
+def threshold_row_to_dict(row):
+    """
+    将阈值查询结果行转换为字典
+    输出格式与Threshold.to_dict()一致
+    """
+    threshold = dict(row)
+    value = threshold['threshold_value']
+    updated_at = threshold['updated_at']
+    threshold['threshold_value'] = float(value) if value else None
+    threshold['updated_at'] = updated_at.isoformat() if updated_at else None
+    return threshold
+
+
+def is_unique_violation(error):
+    """
+    判断IntegrityError是否由唯一约束冲突引起
+    
+    Args:
+        error: sqlalchemy.exc.IntegrityError
+    
+    Returns:
+        bool: MySQL错误码1062、PostgreSQL SQLSTATE 23505或SQLite UNIQUE约束失败时返回True
+    """
+    orig = getattr(error, 'orig', None)
+    if orig is None:
+        return False
+    
+    # PostgreSQL (psycopg2: pgcode, psycopg3: sqlstate)
+    sqlstate = getattr(orig, 'pgcode', None) or getattr(orig, 'sqlstate', None)
+    if sqlstate:
+        return sqlstate == '23505'
+    
+    # MySQL (pymysql: args[0]为错误码)
+    args = getattr(orig, 'args', ())
+    if args and args[0] == 1062:
+        return True
+    
+    return 'UNIQUE constraint failed' in str(orig)
+
+
+def _thresholds_cache_key():
+    """阈值列表缓存键，按查询参数区分"""
+    return f"thresholds:{request.args.get('device_id', '')}:{request.args.get('enabled', '')}"
+
+
 @api_bp.route('/thresholds', methods=['GET'])
 @login_required
+@cached(ttl=15, key_fn=_thresholds_cache_key)
 def get_thresholds():
     """
     获取阈值配置
@@ -882,44 +962,29 @@ def get_thresholds():
         
         # 获取查询参数
         device_id = request.args.get('device_id')
-        enabled_str = request.args.get('enabled')
+        enabled = parse_bool_arg(request.args.get('enabled'))
         
-        # 解析enabled参数
-        enabled = None
-        if enabled_str:
-            if enabled_str.lower() == 'true':
-                enabled = True
-            elif enabled_str.lower() == 'false':
-                enabled = False
+        # 构建查询（只读列查询，不加载ORM实体）
+        stmt = select(*THRESHOLD_COLUMNS)
         
-        db_manager = current_app.db_manager
+        # 应用过滤条件
+        if device_id:
+            stmt = stmt.where(Threshold.device_id == device_id)
+        if enabled is not None:
+            stmt = stmt.where(Threshold.enabled == enabled)
         
-        with db_manager.get_session() as session:
-            from models import Threshold
-            
-            # 构建查询
-            query = session.query(Threshold)
-            
-            # 应用过滤条件
-            if device_id:
-                query = query.filter(Threshold.device_id == device_id)
-            if enabled is not None:
-                query = query.filter(Threshold.enabled == enabled)
-            
-            # 排序
-            query = query.order_by(Threshold.device_id, Threshold.parameter_name)
-            
-            # 执行查询
-            thresholds = query.all()
-            
-            # 转换为字典列表
-            threshold_list = [threshold.to_dict() for threshold in thresholds]
-            
-            return jsonify({
-                'success': True,
-                'thresholds': threshold_list,
-                'total': len(threshold_list)
-            }), 200
+        # 排序
+        stmt = stmt.order_by(Threshold.device_id, Threshold.parameter_name)
+        
+        # 先取出响应开头，查询在此执行，数据库错误仍返回500
+        chunks = generate_thresholds_json(stmt)
+        head = next(chunks)
+        
+        return current_app.response_class(
+            stream_with_context(chain((head,), chunks)),
+            status=200,
+            mimetype='application/json'
+        )
             
     except Exception as e:
         current_app.logger.error(f"获取阈值配置失败: {e}")
@@ -930,6 +995,37 @@ def get_thresholds():
         }), 500
 
 
+def generate_thresholds_json(stmt):
+    """
+    分块生成阈值列表的JSON响应体
+    使用服务端游标按块读取，内存占用与结果集大小无关
+    
+    Args:
+        stmt: 阈值列查询语句
+    
+    Yields:
+        bytes: JSON片段，格式与jsonify({'success', 'thresholds', 'total'})一致
+    """
+    dumps = current_app.json.dumps
+    db_manager = current_app.db_manager
+    
+    with db_manager.get_session() as session:
+        result = session.execute(
+            stmt.execution_options(yield_per=THRESHOLD_STREAM_CHUNK_SIZE)
+        ).mappings()
+        
+        yield b'{"success":true,"thresholds":['
+        
+        total = 0
+        for row in result:
+            if total:
+                yield b','
+            yield dumps(threshold_row_to_dict(row)).encode('utf-8')
+            total += 1
+        
+        yield f'],"total":{total}}}'.encode('utf-8')
+
+
 @api_bp.route('/thresholds/<int:threshold_id>', methods=['PUT'])
 @login_required
 @admin_required
@@ -982,7 +1078,7 @@ def update_threshold(threshold_id):
         
         # 验证报警级别
         alarm_level = data.get('alarm_level')
-        if alarm_level and alarm_level not in ['warning', 'critical', 'emergency']:
+        if alarm_level and alarm_level not in ALARM_LEVELS:
             return jsonify({
                 'success': False,
                 'error': '无效的报警级别',
@@ -990,46 +1086,52 @@ def update_threshold(threshold_id):
             }), 400
         
         # 获取当前用户信息
-        from flask import session
         username = session.get('username', 'unknown')
         
         db_manager = current_app.db_manager
         
         with db_manager.get_session() as db_session:
-            from models import Threshold
-            from datetime import datetime
-            
-            # 查询阈值记录
-            threshold = db_session.query(Threshold).filter(Threshold.id == threshold_id).first()
-            
-            if not threshold:
+            values = {
+                'threshold_value': threshold_value,
+                'updated_by': username
+            }
+            if alarm_level:
+                values['alarm_level'] = alarm_level
+            if 'enabled' in data:
+                values['enabled'] = bool(data['enabled'])
+            
+            stmt = update(Threshold).where(Threshold.id == threshold_id).values(**values)
+            
+            if db_session.get_bind().dialect.update_returning:
+                # 更新并返回新行，一次往返完成（PostgreSQL、SQLite）
+                row = db_session.execute(stmt.returning(*THRESHOLD_COLUMNS)).mappings().first()
+            else:
+                # MySQL不支持UPDATE ... RETURNING，更新成功后按主键读取
+                row = None
+                if db_session.execute(stmt).rowcount:
+                    row = db_session.execute(
+                        select(*THRESHOLD_COLUMNS).where(Threshold.id == threshold_id)
+                    ).mappings().first()
+            
+            if row is None:
                 return jsonify({
                     'success': False,
                     'error': '阈值不存在',
                     'message': f'未找到ID为 {threshold_id} 的阈值配置'
                 }), 404
             
-            # 更新阈值
-            threshold.threshold_value = threshold_value
-            if alarm_level:
-                threshold.alarm_level = alarm_level
-            if 'enabled' in data:
-                threshold.enabled = bool(data['enabled'])
-            
-            threshold.updated_by = username
-            threshold.updated_at = datetime.utcnow()
-            
             db_session.commit()
+            invalidate_cache('thresholds:*')
             
             current_app.logger.info(
                 f"阈值 {threshold_id} 已被用户 {username} 更新: "
-                f"设备={threshold.device_id}, 参数={threshold.parameter_name}, 值={threshold_value}"
+                f"设备={row['device_id']}, 参数={row['parameter_name']}, 值={threshold_value}"
             )
             
             return jsonify({
                 'success': True,
                 'message': '阈值已更新',
-                'threshold': threshold.to_dict()
+                'threshold': threshold_row_to_dict(row)
             }), 200
             
     except Exception as e:
@@ -1041,6 +1143,54 @@ def update_threshold(threshold_id):
         }), 500
 
 
+def validate_threshold_data(data):
+    """
+    验证创建阈值的请求字段
+    
+    Args:
+        data: 单条阈值配置（JSON对象）
+    
+    Returns:
+        dict: 可直接用于创建Threshold的字段
+    
+    Raises:
+        QueryParamError: 字段缺失或无效
+    """
+    device_id = data.get('device_id')
+    parameter_name = data.get('parameter_name')
+    threshold_value = data.get('threshold_value')
+    
+    if not device_id:
+        raise QueryParamError('缺少必需字段', 'device_id字段是必需的')
+    
+    if not parameter_name:
+        raise QueryParamError('缺少必需字段', 'parameter_name字段是必需的')
+    
+    if threshold_value is None:
+        raise QueryParamError('缺少必需字段', 'threshold_value字段是必需的')
+    
+    # 验证阈值数值范围
+    try:
+        threshold_value = float(threshold_value)
+    except (ValueError, TypeError):
+        raise QueryParamError('无效的阈值格式', '阈值必须是数字')
+    if threshold_value < 0:
+        raise QueryParamError('无效的阈值', '阈值必须大于或等于0')
+    
+    # 验证报警级别
+    alarm_level = data.get('alarm_level', 'warning')
+    if alarm_level not in ALARM_LEVELS:
+        raise QueryParamError('无效的报警级别', '报警级别必须是: warning, critical, emergency')
+    
+    return {
+        'device_id': device_id,
+        'parameter_name': parameter_name,
+        'threshold_value': threshold_value,
+        'alarm_level': alarm_level,
+        'enabled': data.get('enabled', True)
+    }
+
+
 @api_bp.route('/thresholds', methods=['POST'])
 @login_required
 @admin_required
@@ -1055,6 +1205,8 @@ def create_threshold():
         - threshold_value: 阈值 (必需)
         - alarm_level: 报警级别 (warning, critical, emergency，默认warning)
         - enabled: 是否启用 (true, false，默认true)
+    
+    请求体也可以是上述对象组成的数组，此时批量创建，一次提交
     """
     try:
         current_app.logger.info("API: 创建阈值配置")
@@ -1068,106 +1220,50 @@ def create_threshold():
                 'message': '请提供JSON格式的请求体'
             }), 400
         
-        # 验证必需字段
-        device_id = data.get('device_id')
-        parameter_name = data.get('parameter_name')
-        threshold_value = data.get('threshold_value')
-        
-        if not device_id:
-            return jsonify({
-                'success': False,
-                'error': '缺少必需字段',
-                'message': 'device_id字段是必需的'
-            }), 400
-        
-        if not parameter_name:
-            return jsonify({
-                'success': False,
-                'error': '缺少必需字段',
-                'message': 'parameter_name字段是必需的'
-            }), 400
-        
-        if threshold_value is None:
-            return jsonify({
-                'success': False,
-                'error': '缺少必需字段',
-                'message': 'threshold_value字段是必需的'
-            }), 400
+        # 批量创建
+        if isinstance(data, list):
+            return create_thresholds_bulk(data)
         
-        # 验证阈值数值范围
+        # 验证字段
         try:
-            threshold_value = float(threshold_value)
-            if threshold_value < 0:
-                return jsonify({
-                    'success': False,
-                    'error': '无效的阈值',
-                    'message': '阈值必须大于或等于0'
-                }), 400
-        except (ValueError, TypeError):
-            return jsonify({
-                'success': False,
-                'error': '无效的阈值格式',
-                'message': '阈值必须是数字'
-            }), 400
-        
-        # 验证报警级别
-        alarm_level = data.get('alarm_level', 'warning')
-        if alarm_level not in ['warning', 'critical', 'emergency']:
-            return jsonify({
-                'success': False,
-                'error': '无效的报警级别',
-                'message': '报警级别必须是: warning, critical, emergency'
-            }), 400
+            row = validate_threshold_data(data)
+        except QueryParamError as e:
+            return query_param_error_response(e)
         
-        # 获取enabled参数
-        enabled = data.get('enabled', True)
+        device_id = row['device_id']
+        parameter_name = row['parameter_name']
+        threshold_value = row['threshold_value']
         
         # 获取当前用户信息
-        from flask import session
         username = session.get('username', 'unknown')
         
         db_manager = current_app.db_manager
         
         with db_manager.get_session() as db_session:
-            from models import Threshold
-            from datetime import datetime
-            from sqlalchemy.exc import IntegrityError
-            
-            # 检查是否已存在相同的设备和参数组合
-            existing = db_session.query(Threshold).filter(
-                Threshold.device_id == device_id,
-                Threshold.parameter_name == parameter_name
-            ).first()
-            
-            if existing:
-                return jsonify({
-                    'success': False,
-                    'error': '阈值已存在',
-                    'message': f'设备 {device_id} 的参数 {parameter_name} 已存在阈值配置'
-                }), 409
-            
             # 创建新阈值
-            new_threshold = Threshold(
-                device_id=device_id,
-                parameter_name=parameter_name,
-                threshold_value=threshold_value,
-                alarm_level=alarm_level,
-                enabled=enabled,
-                updated_by=username,
-                updated_at=datetime.utcnow()
-            )
+            new_threshold = Threshold(**row, updated_by=username)
             
             db_session.add(new_threshold)
             
+            # 依赖uk_device_param唯一约束检测重复，省去插入前的查询
             try:
                 db_session.commit()
-            except IntegrityError:
+            except IntegrityError as e:
                 db_session.rollback()
+                if is_unique_violation(e):
+                    return jsonify({
+                        'success': False,
+                        'error': '阈值已存在',
+                        'message': f'设备 {device_id} 的参数 {parameter_name} 已存在阈值配置'
+                    }), 409
+                current_app.logger.warning(f"创建阈值违反数据库约束: {e.orig}")
                 return jsonify({
                     'success': False,
                     'error': '创建阈值失败',
-                    'message': '数据库约束冲突，可能已存在相同的阈值配置'
-                }), 409
+                    'message': '数据库约束冲突'
+                }), 400
+            
+            invalidate_cache('thresholds:*')
             
             current_app.logger.info(
                 f"阈值已被用户 {username} 创建: "
@@ -1187,3 +1283,65 @@ def create_threshold():
             'error': '创建阈值配置失败',
             'message': str(e)
         }), 500
+
+
+def create_thresholds_bulk(items):
+    """
+    批量创建阈值配置
+    所有记录验证通过后，以一条多行INSERT写入并一次提交
+    
+    Args:
+        items: 阈值配置对象列表
+    """
+    if len(items) > THRESHOLD_BATCH_LIMIT:
+        return jsonify({
+            'success': False,
+            'error': '批量数据过多',
+            'message': f'单次最多创建 {THRESHOLD_BATCH_LIMIT} 条阈值配置'
+        }), 400
+    
+    username = session.get('username', 'unknown')
+    
+    rows = []
+    for index, item in enumerate(items, start=1):
+        try:
+            if not isinstance(item, dict):
+                raise QueryParamError('无效的阈值配置', '每条记录必须是JSON对象')
+            row = validate_threshold_data(item)
+        except QueryParamError as e:
+            e.message = f'第 {index} 条记录: {e.message}'
+            return query_param_error_response(e)
+        
+        row['updated_by'] = username
+        rows.append(row)
+    
+    db_manager = current_app.db_manager
+    
+    with db_manager.get_session() as db_session:
+        try:
+            db_session.execute(insert(Threshold), rows)
+            db_session.commit()
+        except IntegrityError as e:
+            db_session.rollback()
+            if is_unique_violation(e):
+                return jsonify({
+                    'success': False,
+                    'error': '阈值已存在',
+                    'message': '批量数据中包含已存在或重复的设备参数组合'
+                }), 409
+            current_app.logger.warning(f"批量创建阈值违反数据库约束: {e.orig}")
+            return jsonify({
+                'success': False,
+                'error': '创建阈值失败',
+                'message': '数据库约束冲突'
+            }), 400
+    
+    invalidate_cache('thresholds:*')
+    
+    current_app.logger.info(f"用户 {username} 批量创建了 {len(rows)} 条阈值配置")
+    
+    return jsonify({
+        'success': True,
+        'message': f'已创建 {len(rows)} 条阈值配置',
+        'count': len(rows)
+    }), 201
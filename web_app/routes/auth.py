@@ -5,17 +5,27 @@
 
 import sys
 import os
+import time
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from functools import wraps
-from flask import Blueprint, request, jsonify, session, redirect, url_for, render_template, current_app
+from flask import Blueprint, request, jsonify, session, redirect, url_for, render_template, current_app, g
 
 # 添加python_client到路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'python_client'))
-from models import User
+from models import User, check_password_hash
+from .user_cache import get_login_state, cache_login_state
 
 # 创建认证蓝图
 auth_bp = Blueprint('auth', __name__)
 
+# 会话活动时间的最小更新间隔（秒）
+SESSION_ACTIVITY_UPDATE_INTERVAL = 60
+
+# /auth/check 响应的浏览器缓存时间（秒）
+AUTH_CHECK_MAX_AGE = 30
+
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -43,29 +53,30 @@ def login():
                 'message': '用户名和密码不能为空'
             }), 400
         
+        # 先检查缓存的登录状态，不存在的用户和已锁定账户无需访问数据库
+        login_state = get_login_state(username)
+        if login_state is not None:
+            if not login_state['exists']:
+                return _user_not_found_response(username)
+            if login_state['locked_until'] and login_state['locked_until'] > datetime.utcnow():
+                return _account_locked_response(username, login_state['locked_until'])
+        
         # 查询用户
         db_manager = current_app.db_manager
         with db_manager.get_session() as db_session:
             user = db_session.query(User).filter(User.username == username).first()
             
             if not user:
-                current_app.logger.warning(f"登录失败：用户不存在 - {username}")
-                return jsonify({
-                    'success': False,
-                    'message': '用户名或密码错误'
-                }), 401
+                cache_login_state(username, None)
+                return _user_not_found_response(username)
             
             # 检查账户是否被锁定
             if user.is_locked():
-                locked_until = user.locked_until.strftime('%Y-%m-%d %H:%M:%S')
-                current_app.logger.warning(f"登录失败：账户已锁定 - {username}，锁定至 {locked_until}")
-                return jsonify({
-                    'success': False,
-                    'message': f'账户已被锁定，请在 {locked_until} 后重试'
-                }), 403
+                cache_login_state(username, user)
+                return _account_locked_response(username, user.locked_until)
             
             # 验证密码
-            if not user.check_password(password):
+            if not verify_password(user, password):
                 # 增加失败计数
                 user.failed_login_attempts += 1
                 
@@ -75,16 +86,19 @@ def login():
                     lock_duration = current_app.config.get('ACCOUNT_LOCK_DURATION', 600)
                     user.locked_until = datetime.utcnow() + timedelta(seconds=lock_duration)
                     db_session.commit()
+                    cache_login_state(username, user)
                     
                     current_app.logger.warning(
                         f"账户已锁定：{username}，失败次数：{user.failed_login_attempts}"
                     )
                     return jsonify({
                         'success': False,
+                        'code': 'ACCOUNT_LOCKED',
                         'message': f'登录失败次数过多，账户已被锁定 {lock_duration // 60} 分钟'
                     }), 403
                 
                 db_session.commit()
+                cache_login_state(username, user)
                 remaining_attempts = max_attempts - user.failed_login_attempts
                 current_app.logger.warning(
                     f"登录失败：密码错误 - {username}，剩余尝试次数：{remaining_attempts}"
@@ -100,13 +114,16 @@ def login():
             user.locked_until = None
             user.last_login = datetime.utcnow()
             db_session.commit()
+            cache_login_state(username, user)
             
             # 设置会话
             session.clear()
-            session['user_id'] = user.id
-            session['username'] = user.username
-            session['role'] = user.role
-            session['login_time'] = datetime.utcnow().isoformat()
+            session.update({
+                'user_id': user.id,
+                'username': user.username,
+                'role': user.role,
+                'login_time': time.time()
+            })
             session.permanent = True  # 使用PERMANENT_SESSION_LIFETIME配置
             
             current_app.logger.info(f"用户登录成功：{username}，角色：{user.role}")
@@ -130,6 +147,75 @@ def login():
         }), 500
 
 
+def _user_not_found_response(username):
+    """用户不存在时的登录失败响应"""
+    current_app.logger.warning(f"登录失败：用户不存在 - {username}")
+    return jsonify({
+        'success': False,
+        'message': '用户名或密码错误'
+    }), 401
+
+
+def _account_locked_response(username, locked_until):
+    """账户锁定时的登录失败响应"""
+    locked_until = locked_until.strftime('%Y-%m-%d %H:%M:%S')
+    current_app.logger.warning(f"登录失败：账户已锁定 - {username}，锁定至 {locked_until}")
+    return jsonify({
+        'success': False,
+        'code': 'ACCOUNT_LOCKED',
+        'message': f'账户已被锁定，请在 {locked_until} 后重试'
+    }), 403
+
+
+# 密码验证进程池在app.extensions中的键名
+PASSWORD_POOL_EXTENSION = 'password_pool'
+
+# 保护进程池的首次创建（多个请求线程可能同时首次登录）
+_password_pool_lock = threading.Lock()
+
+
+def get_password_pool(app):
+    """
+    获取应用的密码验证进程池（默认关闭，首次登录时创建）
+    bcrypt验证时会释放GIL，多线程部署下请求线程之间本身可以并行验证；
+    进程池只用于把验证的CPU开销移出Web进程，请求线程仍会等待验证结果。
+    延迟到首次使用时创建，导入app模块（包括子进程重新导入）不会启动进程；
+    进程池在解释器退出时关闭。
+    
+    Args:
+        app: Flask应用实例
+    
+    Returns:
+        ProcessPoolExecutor，PASSWORD_CHECK_WORKERS为0时返回None（在请求线程中验证）
+    """
+    workers = app.config.get('PASSWORD_CHECK_WORKERS', 0)
+    if not workers:
+        return None
+    
+    with _password_pool_lock:
+        pool = app.extensions.get(PASSWORD_POOL_EXTENSION)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            atexit.register(pool.shutdown)
+            app.extensions[PASSWORD_POOL_EXTENSION] = pool
+            app.logger.info(f"密码验证进程池已启用，进程数：{workers}")
+    return pool
+
+
+def verify_password(user, password):
+    """
+    验证用户密码，已启用进程池时在进程池中执行
+    
+    Args:
+        user: User实例
+        password: 明文密码
+    """
+    pool = get_password_pool(current_app)
+    if pool is None:
+        return user.check_password(password)
+    return pool.submit(check_password_hash, user.password_hash, password).result()
+
+
 @auth_bp.route('/logout', methods=['POST', 'GET'])
 def logout():
     """
@@ -163,25 +249,101 @@ def check_session():
         }), 401
     
     # 检查会话超时（30分钟无操作）
-    login_time_str = session.get('login_time')
-    if login_time_str:
-        login_time = datetime.fromisoformat(login_time_str)
+    login_time = _session_timestamp('login_time')
+    if login_time:
         session_lifetime = current_app.config.get('PERMANENT_SESSION_LIFETIME', 1800)
-        if (datetime.utcnow() - login_time).total_seconds() > session_lifetime:
+        if time.time() - login_time > session_lifetime:
             session.clear()
             return jsonify({
                 'authenticated': False,
                 'message': '会话已超时，请重新登录'
             }), 401
     
-    return jsonify({
-        'authenticated': True,
-        'user': {
-            'id': session.get('user_id'),
-            'username': session.get('username'),
-            'role': session.get('role')
-        }
-    }), 200
+    # 会话未变化时返回304，前端轮询可直接使用浏览器缓存
+    etag = f"{session['user_id']}-{login_time}"
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify({
+            'authenticated': True,
+            'user': {
+                'id': session.get('user_id'),
+                'username': session.get('username'),
+                'role': session.get('role')
+            }
+        })
+    
+    response.set_etag(etag, weak=True)
+    response.cache_control.private = True
+    response.cache_control.max_age = AUTH_CHECK_MAX_AGE
+    response.vary.add('Cookie')
+    return response
+
+
+@auth_bp.before_app_request
+def auth_gate():
+    """
+    统一的认证和权限检查
+    根据视图函数上由login_required/admin_required/role_required标记的要求，
+    每个请求只计算一次认证状态，结果保存在g上供视图使用
+    """
+    view = current_app.view_functions.get(request.endpoint)
+    requires_login = getattr(view, 'requires_login', False)
+    required_role = getattr(view, 'required_role', None)
+    if not requires_login and not required_role:
+        return None
+    
+    is_api_request = request.is_json or request.path.startswith('/api/')
+    
+    if 'user_id' not in session:
+        current_app.logger.warning(f"未授权访问: {request.path}")
+        if is_api_request:
+            return jsonify({
+                'error': 'Unauthorized',
+                'code': 'UNAUTHORIZED',
+                'message': '未授权，请先登录'
+            }), 401
+        return redirect(url_for('auth.login'))
+    
+    # 检查会话超时
+    last_activity = _session_timestamp('last_activity')
+    if last_activity:
+        session_lifetime = current_app.config.get('PERMANENT_SESSION_LIFETIME', 1800)
+        if time.time() - last_activity > session_lifetime:
+            session.clear()
+            current_app.logger.info(f"会话超时，用户已登出")
+            if is_api_request:
+                return jsonify({
+                    'error': 'Session Timeout',
+                    'code': 'SESSION_TIMEOUT',
+                    'message': '会话已超时，请重新登录'
+                }), 401
+            return redirect(url_for('auth.login'))
+    
+    # 检查用户角色
+    user_role = session.get('role')
+    if required_role and user_role != required_role:
+        current_app.logger.warning(
+            f"权限不足: 用户 {session.get('username')} (角色: {user_role}) "
+            f"尝试访问需要 {required_role} 角色的功能 {request.path}"
+        )
+        if required_role == 'admin':
+            message = '权限不足，需要管理员权限'
+        else:
+            message = f'权限不足，需要 {required_role} 角色'
+        if is_api_request:
+            return jsonify({
+                'error': 'Forbidden',
+                'code': 'FORBIDDEN',
+                'message': message
+            }), 403
+        return render_template('error.html', 
+                             error_code=403, 
+                             error_message=message), 403
+    
+    g.user_id = session['user_id']
+    g.user_role = user_role
+    return None
 
 
 @auth_bp.before_app_request
@@ -189,16 +351,39 @@ def update_session_activity():
     """
     在每次请求前更新会话活动时间
     实现30分钟无操作自动登出
+    
+    静态资源请求不更新；距上次更新不足60秒时也跳过，
+    避免每个响应都重新签名并下发会话Cookie
+    """
+    if request.endpoint in (None, 'static') or request.path.startswith('/static/'):
+        return
+    if 'user_id' not in session:
+        return
+    
+    now = time.time()
+    last_activity = _session_timestamp('last_activity')
+    if last_activity and now - last_activity < SESSION_ACTIVITY_UPDATE_INTERVAL:
+        return
+    
+    # 更新最后活动时间（UNIX时间戳，比较时无需解析字符串）
+    session['last_activity'] = now
+
+
+def _session_timestamp(key):
     """
-    if 'user_id' in session:
-        # 更新最后活动时间
-        session['last_activity'] = datetime.utcnow().isoformat()
+    读取会话中的UNIX时间戳
+    旧版本会话中的ISO字符串视为不存在
+    """
+    value = session.get(key)
+    if isinstance(value, (int, float)):
+        return value
+    return None
 
 
 def login_required(f):
     """
     登录验证装饰器
-    要求用户必须登录才能访问被装饰的路由
+    标记路由需要登录，实际检查由auth_gate在请求开始时统一执行
     
     使用示例:
         @app.route('/protected')
@@ -206,41 +391,14 @@ def login_required(f):
         def protected_route():
             return "This is protected"
     """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            current_app.logger.warning(f"未授权访问: {request.path}")
-            if request.is_json or request.path.startswith('/api/'):
-                return jsonify({
-                    'error': 'Unauthorized',
-                    'message': '未授权，请先登录'
-                }), 401
-            return redirect(url_for('auth.login'))
-        
-        # 检查会话超时
-        last_activity_str = session.get('last_activity')
-        if last_activity_str:
-            last_activity = datetime.fromisoformat(last_activity_str)
-            session_lifetime = current_app.config.get('PERMANENT_SESSION_LIFETIME', 1800)
-            if (datetime.utcnow() - last_activity).total_seconds() > session_lifetime:
-                session.clear()
-                current_app.logger.info(f"会话超时，用户已登出")
-                if request.is_json or request.path.startswith('/api/'):
-                    return jsonify({
-                        'error': 'Session Timeout',
-                        'message': '会话已超时，请重新登录'
-                    }), 401
-                return redirect(url_for('auth.login'))
-        
-        return f(*args, **kwargs)
-    
-    return decorated_function
+    f.requires_login = True
+    return f
 
 
 def admin_required(f):
     """
     管理员权限验证装饰器
-    要求用户必须是管理员才能访问被装饰的路由
+    标记路由需要管理员角色，实际检查由auth_gate在请求开始时统一执行
     
     使用示例:
         @app.route('/admin/settings')
@@ -249,41 +407,14 @@ def admin_required(f):
         def admin_settings():
             return "Admin only"
     """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            current_app.logger.warning(f"未授权访问: {request.path}")
-            if request.is_json or request.path.startswith('/api/'):
-                return jsonify({
-                    'error': 'Unauthorized',
-                    'message': '未授权，请先登录'
-                }), 401
-            return redirect(url_for('auth.login'))
-        
-        # 检查用户角色
-        user_role = session.get('role')
-        if user_role != 'admin':
-            current_app.logger.warning(
-                f"权限不足: 用户 {session.get('username')} 尝试访问管理员功能 {request.path}"
-            )
-            if request.is_json or request.path.startswith('/api/'):
-                return jsonify({
-                    'error': 'Forbidden',
-                    'message': '权限不足，需要管理员权限'
-                }), 403
-            return render_template('error.html', 
-                                 error_code=403, 
-                                 error_message='权限不足，需要管理员权限'), 403
-        
-        return f(*args, **kwargs)
-    
-    return decorated_function
+    f.required_role = 'admin'
+    return f
 
 
 def role_required(required_role):
     """
     角色验证装饰器工厂
-    要求用户具有指定角色才能访问被装饰的路由
+    标记路由需要指定角色，实际检查由auth_gate在请求开始时统一执行
     
     Args:
         required_role: 所需的角色名称
@@ -296,33 +427,7 @@ def role_required(required_role):
             return "Manager only"
     """
     def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            if 'user_id' not in session:
-                if request.is_json or request.path.startswith('/api/'):
-                    return jsonify({
-                        'error': 'Unauthorized',
-                        'message': '未授权，请先登录'
-                    }), 401
-                return redirect(url_for('auth.login'))
-            
-            user_role = session.get('role')
-            if user_role != required_role:
-                current_app.logger.warning(
-                    f"权限不足: 用户 {session.get('username')} (角色: {user_role}) "
-                    f"尝试访问需要 {required_role} 角色的功能 {request.path}"
-                )
-                if request.is_json or request.path.startswith('/api/'):
-                    return jsonify({
-                        'error': 'Forbidden',
-                        'message': f'权限不足，需要 {required_role} 角色'
-                    }), 403
-                return render_template('error.html', 
-                                     error_code=403, 
-                                     error_message=f'权限不足，需要 {required_role} 角色'), 403
-            
-            return f(*args, **kwargs)
-        
-        return decorated_function
+        f.required_role = required_role
+        return f
     
     return decorator
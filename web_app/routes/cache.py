@@ -0,0 +1,173 @@
+"""
+响应缓存模块
+基于Redis缓存读多写少的API响应，未配置Redis时直接透传
+"""
+
+from functools import wraps
+from flask import current_app, make_response
+
+try:
+    import redis
+except ImportError:  # Redis为可选依赖，未安装时禁用缓存
+    redis = None
+
+
+def init_redis(app):
+    """
+    根据REDIS_URL配置创建Redis客户端
+    
+    Args:
+        app: Flask应用实例
+    
+    Returns:
+        Redis客户端，未配置或不可用时返回None
+    """
+    redis_url = app.config.get('REDIS_URL')
+    if not redis_url:
+        app.logger.info("未配置REDIS_URL，响应缓存已禁用")
+        return None
+    
+    if redis is None:
+        app.logger.warning("未安装redis库，响应缓存已禁用")
+        return None
+    
+    try:
+        client = redis.Redis.from_url(redis_url)
+        client.ping()
+        app.logger.info("Redis连接成功，响应缓存已启用")
+        return client
+    except Exception as e:
+        app.logger.error(f"Redis连接失败，响应缓存已禁用: {e}")
+        return None
+
+
+def cached(ttl, key_fn):
+    """
+    响应缓存装饰器
+    命中时直接返回缓存的响应体；未命中时执行视图函数并缓存200响应。
+    流式响应在输出给客户端的同时收集响应体，完整输出后再写入缓存。
+    视图返回5xx（如数据库不可用）时，回退到过期的缓存副本。
+    
+    Args:
+        ttl: 缓存有效期（秒）
+        key_fn: 在请求上下文中生成缓存键的函数
+    
+    使用示例:
+        @api_bp.route('/thresholds')
+        @cached(ttl=15, key_fn=lambda: f"thresholds:{request.args.get('device_id', '')}")
+        def get_thresholds():
+            ...
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            client = getattr(current_app, 'redis', None)
+            if client is None:
+                return f(*args, **kwargs)
+            
+            key = key_fn()
+            stale_key = f"{key}:stale"
+            
+            entry = _read_entry(client, key)
+            if entry:
+                return _cached_response(entry, 'HIT')
+            
+            response = make_response(f(*args, **kwargs))
+            
+            if response.status_code == 200:
+                app = current_app._get_current_object()
+                if response.is_streamed:
+                    # 不能调用get_data()，否则会先缓冲整个响应体，流式输出失效
+                    response.response = _stream_and_cache(
+                        app, response.response, client, key, stale_key, response.mimetype, ttl
+                    )
+                else:
+                    _write_entry(app, client, key, stale_key, response.get_data(), response.mimetype, ttl)
+                response.headers['X-Cache'] = 'MISS'
+            elif response.status_code >= 500:
+                entry = _read_entry(client, stale_key)
+                if entry:
+                    current_app.logger.warning(f"返回过期缓存: {key}")
+                    return _cached_response(entry, 'STALE')
+            
+            return response
+        
+        return decorated_function
+    
+    return decorator
+
+
+def invalidate_cache(pattern):
+    """
+    删除匹配模式的所有缓存键
+    
+    Args:
+        pattern: Redis键模式，例如 'thresholds:*'
+    """
+    client = getattr(current_app, 'redis', None)
+    if client is None:
+        return
+    
+    try:
+        keys = list(client.scan_iter(pattern))
+        if keys:
+            client.delete(*keys)
+    except Exception as e:
+        current_app.logger.error(f"清除缓存失败 ({pattern}): {e}")
+
+
+def _read_entry(client, key):
+    """读取缓存条目，Redis异常时视为未命中"""
+    try:
+        return client.hgetall(key)
+    except Exception as e:
+        current_app.logger.error(f"读取缓存失败 ({key}): {e}")
+        return None
+
+
+def _write_entry(app, client, key, stale_key, body, content_type, ttl):
+    """
+    写入缓存条目及其过期备份
+    流式响应输出结束时请求上下文可能已经结束，因此显式传入应用实例
+    """
+    mapping = {
+        'body': body,
+        'content_type': content_type
+    }
+    stale_ttl = app.config.get('CACHE_STALE_TTL', 3600)
+    try:
+        client.hset(key, mapping=mapping)
+        client.expire(key, ttl)
+        client.hset(stale_key, mapping=mapping)
+        client.expire(stale_key, stale_ttl)
+    except Exception as e:
+        app.logger.error(f"写入缓存失败 ({key}): {e}")
+
+
+def _stream_and_cache(app, chunks, client, key, stale_key, content_type, ttl):
+    """
+    逐块输出流式响应，同时收集响应体
+    客户端完整读取后才写入缓存，中途断开时不缓存不完整的响应
+    """
+    body = []
+    try:
+        for chunk in chunks:
+            body.append(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+            yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+    
+    _write_entry(app, client, key, stale_key, b''.join(body), content_type, ttl)
+
+
+def _cached_response(entry, status):
+    """根据缓存条目构建响应"""
+    response = current_app.response_class(
+        entry[b'body'],
+        status=200,
+        mimetype=entry[b'content_type'].decode('utf-8')
+    )
+    response.headers['X-Cache'] = status
+    return response
@@ -3,12 +3,47 @@
 提供仪表盘页面和相关功能
 """
 
-from flask import Blueprint, render_template, current_app
+from functools import lru_cache
+from flask import Blueprint, render_template, current_app, session
 from .auth import login_required
 
 # 创建仪表盘蓝图
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# 页面缓存在app.extensions中的键名，及每个应用最多缓存的页面数
+PAGE_CACHE_EXTENSION = 'dashboard_page_cache'
+PAGE_CACHE_SIZE = 256
+
+
+@dashboard_bp.record_once
+def init_page_cache(state):
+    """
+    注册蓝图时为应用创建独立的页面缓存
+    缓存保存在应用上，同一进程中的多个应用实例不会共享渲染结果
+    """
+    state.app.extensions[PAGE_CACHE_EXTENSION] = lru_cache(maxsize=PAGE_CACHE_SIZE)(_render_for)
+
+
+def render_page(template_name):
+    """
+    渲染页面并缓存结果
+    页面模板只依赖会话中的用户名和角色（以及固定的路由路径），
+    因此按 (模板, 用户名, 角色) 缓存渲染后的HTML，之后的请求直接返回。
+    开启模板自动重载（调试模式）时不缓存，修改模板后立即生效。
+    
+    Args:
+        template_name: 模板文件名
+    """
+    if current_app.jinja_env.auto_reload:
+        return render_template(template_name)
+    render_cached = current_app.extensions[PAGE_CACHE_EXTENSION]
+    return render_cached(template_name, session.get('username'), session.get('role'))
+
+
+def _render_for(template_name, username, role):
+    """按缓存键渲染模板（username和role仅作为缓存键，模板从当前会话读取）"""
+    return render_template(template_name)
+
 
 @dashboard_bp.route('/')
 @login_required
@@ -18,7 +53,7 @@ def index():
     显示实时设备状态、能耗数据和报警信息
     """
     current_app.logger.info("访问仪表盘主页")
-    return render_template('dashboard.html')
+    return render_page('dashboard.html')
 
 
 @dashboard_bp.route('/history')
@@ -29,7 +64,7 @@ def history():
     """
     current_app.logger.info("访问历史数据页面")
     # TODO: 在任务11中实现历史数据页面
-    return render_template('history.html')
+    return render_page('history.html')
 
 
 @dashboard_bp.route('/alarms')
@@ -40,7 +75,7 @@ def alarms():
     """
     current_app.logger.info("访问报警管理页面")
     # TODO: 在任务11中实现报警管理页面
-    return render_template('alarms.html')
+    return render_page('alarms.html')
 
 
 @dashboard_bp.route('/settings')
@@ -51,4 +86,4 @@ def settings():
     """
     current_app.logger.info("访问系统设置页面")
     # TODO: 在任务11中实现设置页面
-    return render_template('settings.html')
+    return render_page('settings.html')
@@ -0,0 +1,68 @@
+"""
+登录状态缓存模块
+在Redis中缓存用户是否存在及锁定状态，暴力破解时不存在的用户名和
+已锁定账户的登录请求无需访问数据库。数据库仍是唯一的数据来源，
+登录流程每次写库后同步更新缓存。
+"""
+
+from datetime import datetime
+from flask import current_app
+
+# 登录状态缓存键前缀
+USER_CACHE_PREFIX = 'u:'
+
+
+def get_login_state(username):
+    """
+    读取缓存的登录状态
+    
+    Args:
+        username: 用户名
+    
+    Returns:
+        dict: {'exists': bool, 'locked_until': datetime或None}，
+              未启用Redis或未命中时返回None
+    """
+    client = getattr(current_app, 'redis', None)
+    if client is None:
+        return None
+    
+    try:
+        entry = client.hgetall(f"{USER_CACHE_PREFIX}{username}")
+    except Exception as e:
+        current_app.logger.error(f"读取登录状态缓存失败 ({username}): {e}")
+        return None
+    
+    if not entry:
+        return None
+    
+    locked_until = entry.get(b'locked_until', b'').decode('utf-8')
+    return {
+        'exists': entry.get(b'exists') == b'1',
+        'locked_until': datetime.fromisoformat(locked_until) if locked_until else None
+    }
+
+
+def cache_login_state(username, user):
+    """
+    写入登录状态（写库之后调用）
+    
+    Args:
+        username: 用户名
+        user: User实例，用户不存在时为None
+    """
+    client = getattr(current_app, 'redis', None)
+    if client is None:
+        return
+    
+    key = f"{USER_CACHE_PREFIX}{username}"
+    mapping = {
+        'exists': '1' if user else '0',
+        'failed_login_attempts': user.failed_login_attempts if user else 0,
+        'locked_until': user.locked_until.isoformat() if user and user.locked_until else ''
+    }
+    try:
+        client.hset(key, mapping=mapping)
+        client.expire(key, current_app.config.get('USER_CACHE_TTL', 60))
+    except Exception as e:
+        current_app.logger.error(f"写入登录状态缓存失败 ({username}): {e}")
@@ -0,0 +1,36 @@
+"""
+服务端会话存储模块
+配置SESSION_STORE=redis后，会话数据保存在Redis中，Cookie只携带会话ID
+未启用或依赖不可用时保持Flask默认的签名Cookie会话
+"""
+
+try:
+    from flask_session import Session
+except ImportError:  # Flask-Session为可选依赖，未安装时使用Cookie会话
+    Session = None
+
+
+def init_session_store(app):
+    """
+    根据SESSION_STORE配置初始化会话存储
+    需要在init_redis之后调用，复用app.redis连接
+    
+    Args:
+        app: Flask应用实例
+    """
+    if app.config.get('SESSION_STORE', 'cookie') != 'redis':
+        return
+    
+    if Session is None:
+        app.logger.warning("未安装Flask-Session，继续使用Cookie会话")
+        return
+    
+    if getattr(app, 'redis', None) is None:
+        app.logger.warning("Redis不可用，继续使用Cookie会话")
+        return
+    
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = app.redis
+    app.config.setdefault('SESSION_KEY_PREFIX', 'session:')
+    Session(app)
+    app.logger.info("会话数据已改为保存在Redis中")
@@ -11,19 +11,63 @@ API端点综合测试
 """
 
 import pytest
-import sys
 import os
+import copy
+import json
 from datetime import datetime, timedelta
-from unittest.mock import Mock, MagicMock, patch
+from types import SimpleNamespace
+from unittest.mock import patch
 from contextlib import contextmanager
 
-# 添加项目路径
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'python_client'))
+# 未安装Flask时（如只做代码检查的CI环境）在收集阶段直接跳过整个模块
+pytest.importorskip('flask')
+
+from werkzeug.test import EnvironBuilder
+
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import BinaryExpression, BindParameter, BooleanClauseList, False_, True_
+
+# 应用模块只导入一次（与其他测试共用真实的models模块，数据库由MockDatabaseManager模拟）
+import app as app_module
+
+# pytest-xdist工作进程ID（gw0、gw1...），串行运行时为空
+WORKER_ID = os.environ.get('PYTEST_XDIST_WORKER', '')
+
+# 模拟数据的默认时间（固定值，避免每次创建模拟对象都获取当前时间）
+_NOW = datetime(2024, 1, 1, 0, 0, 0)
+_NOW_ISO = _NOW.isoformat()
+
+
+def isoformat(value):
+    """格式化时间，默认时间直接返回预先格式化的字符串"""
+    return _NOW_ISO if value is _NOW else value.isoformat()
+
+
+class CachedDictMixin:
+    """
+    缓存to_dict()的结果，任一属性被修改时缓存失效
+    子类实现_build_dict()构建字典
+    """
+    
+    __slots__ = ('_cached_dict',)
+    
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, '_cached_dict', None)
+    
+    def to_dict(self):
+        if self._cached_dict is None:
+            object.__setattr__(self, '_cached_dict', self._build_dict())
+        return self._cached_dict
 
 
 # 模拟数据库模型
 class MockUser:
+    __slots__ = (
+        'id', 'username', 'role', 'email', 'failed_login_attempts',
+        'locked_until', 'last_login', '_password_hash'
+    )
+    
     def __init__(self, id, username, role, email):
         self.id = id
         self.username = username
@@ -47,20 +91,22 @@ class MockUser:
         return False
 
 
-class MockEnergyData:
+class MockEnergyData(CachedDictMixin):
+    __slots__ = ('id', 'timestamp', 'device_id', 'device_name', 'power_kw', 'energy_kwh', 'status')
+    
     def __init__(self, **kwargs):
         self.id = kwargs.get('id', 1)
-        self.timestamp = kwargs.get('timestamp', datetime.utcnow())
+        self.timestamp = kwargs.get('timestamp', _NOW)
         self.device_id = kwargs.get('device_id', 'conveyor')
         self.device_name = kwargs.get('device_name', '传送带')
         self.power_kw = kwargs.get('power_kw', 2.5)
         self.energy_kwh = kwargs.get('energy_kwh', 15.3)
         self.status = kwargs.get('status', 'running')
     
-    def to_dict(self):
+    def _build_dict(self):
         return {
             'id': self.id,
-            'timestamp': self.timestamp.isoformat(),
+            'timestamp': isoformat(self.timestamp),
             'device_id': self.device_id,
             'device_name': self.device_name,
             'power_kw': self.power_kw,
@@ -69,10 +115,15 @@ class MockEnergyData:
         }
 
 
-class MockAlarm:
+class MockAlarm(CachedDictMixin):
+    __slots__ = (
+        'id', 'timestamp', 'device_id', 'alarm_type', 'alarm_level', 'message',
+        'threshold_value', 'actual_value', 'acknowledged', 'acknowledged_by', 'acknowledged_at'
+    )
+    
     def __init__(self, **kwargs):
         self.id = kwargs.get('id', 1)
-        self.timestamp = kwargs.get('timestamp', datetime.utcnow())
+        self.timestamp = kwargs.get('timestamp', _NOW)
         self.device_id = kwargs.get('device_id', 'station1')
         self.alarm_type = kwargs.get('alarm_type', 'energy_high')
         self.alarm_level = kwargs.get('alarm_level', 'warning')
@@ -83,10 +134,10 @@ class MockAlarm:
         self.acknowledged_by = kwargs.get('acknowledged_by', None)
         self.acknowledged_at = kwargs.get('acknowledged_at', None)
     
-    def to_dict(self):
+    def _build_dict(self):
         return {
             'id': self.id,
-            'timestamp': self.timestamp.isoformat(),
+            'timestamp': isoformat(self.timestamp),
             'device_id': self.device_id,
             'alarm_type': self.alarm_type,
             'alarm_level': self.alarm_level,
@@ -99,7 +150,12 @@ class MockAlarm:
         }
 
 
-class MockThreshold:
+class MockThreshold(CachedDictMixin):
+    __slots__ = (
+        'id', 'device_id', 'parameter_name', 'threshold_value', 'alarm_level',
+        'enabled', 'updated_by', 'updated_at'
+    )
+    
     def __init__(self, **kwargs):
         self.id = kwargs.get('id', 1)
         self.device_id = kwargs.get('device_id', 'conveyor')
@@ -108,9 +164,9 @@ class MockThreshold:
         self.alarm_level = kwargs.get('alarm_level', 'warning')
         self.enabled = kwargs.get('enabled', True)
         self.updated_by = kwargs.get('updated_by', 'admin')
-        self.updated_at = kwargs.get('updated_at', datetime.utcnow())
+        self.updated_at = kwargs.get('updated_at', _NOW)
     
-    def to_dict(self):
+    def _build_dict(self):
         return {
             'id': self.id,
             'device_id': self.device_id,
@@ -119,26 +175,157 @@ class MockThreshold:
             'alarm_level': self.alarm_level,
             'enabled': self.enabled,
             'updated_by': self.updated_by,
-            'updated_at': self.updated_at.isoformat()
+            'updated_at': isoformat(self.updated_at)
         }
 
 
+# 用户模板（密码只设置一次，每个会话使用其副本）
+_USER_TEMPLATES = {
+    'admin': MockUser(1, 'admin', 'admin', 'admin@test.com'),
+    'user': MockUser(2, 'user', 'user', 'user@test.com')
+}
+_USER_TEMPLATES['admin'].set_password('admin123')
+_USER_TEMPLATES['user'].set_password('user123')
+
+
+def copy_users(users):
+    """浅拷贝用户（属性均为不可变值，拷贝后可独立修改登录状态）"""
+    return {username: copy.copy(user) for username, user in users.items()}
+
+
+def equality_criteria(clause):
+    """
+    提取查询条件中的等值比较，返回 [(列名, 值), ...]
+    模拟查询只按等值条件过滤，时间范围等其他条件不影响结果
+    """
+    if clause is None:
+        return []
+    if isinstance(clause, BooleanClauseList):
+        return [criterion for sub in clause.clauses for criterion in equality_criteria(sub)]
+    if isinstance(clause, BinaryExpression) and clause.operator is operators.eq:
+        right = clause.right
+        if isinstance(right, BindParameter):
+            return [(clause.left.key, right.value)]
+        if isinstance(right, (True_, False_)):
+            return [(clause.left.key, isinstance(right, True_))]
+    return []
+
+
+def match_criteria(records, criteria):
+    """按等值条件过滤模拟记录"""
+    if not criteria:
+        return records
+    return [
+        record for record in records
+        if all(getattr(record, key) == value for key, value in criteria)
+    ]
+
+
+class MockResult:
+    """模拟Core语句的执行结果（mappings()返回自身，每行为字典）"""
+    
+    def __init__(self, rows, rowcount=None):
+        self.rows = rows
+        self.rowcount = len(rows) if rowcount is None else rowcount
+    
+    def mappings(self):
+        return self
+    
+    def __iter__(self):
+        return iter(self.rows)
+    
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+# 模拟数据库连接（与SQLite一样支持UPDATE ... RETURNING）
+MOCK_BIND = SimpleNamespace(dialect=SimpleNamespace(name='sqlite', update_returning=True))
+
+
+# 只读测试共享的模拟数据（模块加载时只构建一次）
+_ENERGY_FIXTURE = tuple(MockEnergyData(id=i) for i in range(1, 6))
+_ALARM_FIXTURE = (MockAlarm(id=1),)
+_THRESHOLD_FIXTURE = (MockThreshold(id=1),)
+
+
 # 模拟数据库会话
 class MockSession:
-    def __init__(self):
-        self.users = {
-            'admin': MockUser(1, 'admin', 'admin', 'admin@test.com'),
-            'user': MockUser(2, 'user', 'user', 'user@test.com')
+    def __init__(self, readonly=True):
+        """
+        Args:
+            readonly: 为True时共享模块级的只读数据，
+                      会修改数据的测试（确认报警、更新阈值）需使用False
+        """
+        self.readonly = readonly
+        self.users = copy_users(_USER_TEMPLATES)
+        
+        if readonly:
+            self.energy_data = _ENERGY_FIXTURE
+            self.alarms = _ALARM_FIXTURE
+            self.thresholds = _THRESHOLD_FIXTURE
+        else:
+            self.energy_data = [MockEnergyData(id=i) for i in range(1, 6)]
+            self.alarms = [MockAlarm(id=1)]
+            self.thresholds = [MockThreshold(id=1)]
+    
+    def __deepcopy__(self, memo):
+        # 用户数据在登录时会被修改，始终复制；只读数据直接共享
+        clone = copy.copy(self)
+        clone.users = copy_users(self.users)
+        if not self.readonly:
+            clone.energy_data = copy.deepcopy(self.energy_data, memo)
+            clone.alarms = copy.deepcopy(self.alarms, memo)
+            clone.thresholds = copy.deepcopy(self.thresholds, memo)
+        return clone
+    
+    def query(self, *entities):
+        # 查询单个模型时返回模型记录，多列/聚合查询（能耗汇总、OEE、报警统计）返回空结果
+        if len(entities) == 1 and isinstance(entities[0], type):
+            return MockQuery(self, entities[0])
+        return MockAggregateQuery()
+    
+    def table_records(self, table):
+        """按表名获取模拟数据（会话属性与表名一致）"""
+        records = getattr(self, table.name, ())
+        return list(records.values()) if isinstance(records, dict) else records
+    
+    def get_bind(self):
+        return MOCK_BIND
+    
+    def execute(self, statement, params=None):
+        """
+        执行Core语句（阈值列表的列查询、阈值的UPDATE ... RETURNING）
+        按WHERE中的等值条件匹配记录，每行返回所选列组成的字典
+        """
+        if statement.is_update:
+            return self._execute_update(statement)
+        
+        table = statement.get_final_froms()[0]
+        records = match_criteria(self.table_records(table), equality_criteria(statement.whereclause))
+        keys = [column.key for column in statement.selected_columns]
+        return MockResult([{key: getattr(record, key) for key in keys} for record in records])
+    
+    def _execute_update(self, statement):
+        """更新匹配的记录，有RETURNING子句时返回更新后的列"""
+        if self.readonly:
+            # 只读会话的数据在测试之间共享，修改会影响其他测试
+            raise RuntimeError("只读模拟会话不支持UPDATE，修改数据的测试请使用writable_db fixture")
+        
+        table = statement.table
+        records = match_criteria(self.table_records(table), equality_criteria(statement.whereclause))
+        
+        # 编译后的参数包含SET的值（以列名为键）和WHERE条件的参数
+        values = {
+            key: value for key, value in statement.compile().params.items()
+            if key in table.c
         }
-        self.users['admin'].set_password('admin123')
-        self.users['user'].set_password('user123')
+        for record in records:
+            for key, value in values.items():
+                setattr(record, key, value)
         
-        self.energy_data = [MockEnergyData(id=i) for i in range(1, 6)]
-        self.alarms = [MockAlarm(id=1)]
-        self.thresholds = [MockThreshold(id=1)]
-    
-    def query(self, model):
-        return MockQuery(self, model)
+        keys = [column.key for column in statement.exported_columns]
+        rows = [{key: getattr(record, key) for key in keys} for record in records]
+        return MockResult(rows, rowcount=len(records))
     
     def add(self, obj):
         pass
@@ -154,42 +341,62 @@ class MockQuery:
     def __init__(self, session, model):
         self.session = session
         self.model = model
-        self.filters = []
-        self._limit = None
-        self._offset = None
-        self._order_by = None
-    
-    def filter(self, *args):
-        self.filters.append(args)
+        self._criteria = []
+        self._cached = None
+    
+    def filter(self, *criteria):
+        # 只记录等值条件（如按用户名登录、按ID确认报警），时间范围等条件不影响结果
+        for criterion in criteria:
+            self._criteria.extend(equality_criteria(criterion))
+        self._cached = None
         return self
     
+    # 排序和分页条件不影响模拟查询结果，链式调用直接返回自身
     def order_by(self, *args):
-        self._order_by = args
         return self
     
     def limit(self, n):
-        self._limit = n
         return self
     
     def offset(self, n):
-        self._offset = n
         return self
     
     def first(self):
         results = self.all()
         return results[0] if results else None
     
+    # 模型名称到会话数据的映射
+    _MODEL_DATA = (
+        ('User', lambda session: list(session.users.values())),
+        ('EnergyData', lambda session: session.energy_data),
+        ('Alarm', lambda session: session.alarms),
+        ('Threshold', lambda session: session.thresholds),
+    )
+    
+    # 模型类到数据获取函数的缓存（每个类只做一次名称匹配）
+    # 与其他测试一起运行时路由可能绑定真实的模型类，因此不能只登记模拟类
+    _MODEL_DISPATCH = {}
+    
+    @classmethod
+    def _resolve(cls, model):
+        name = model.__name__ if isinstance(model, type) else str(model)
+        for key, fn in cls._MODEL_DATA:
+            if key in name:
+                return fn
+        return None
+    
     def all(self):
-        # 简化的查询逻辑
-        if 'User' in str(self.model):
-            return list(self.session.users.values())
-        elif 'EnergyData' in str(self.model):
-            return self.session.energy_data
-        elif 'Alarm' in str(self.model):
-            return self.session.alarms
-        elif 'Threshold' in str(self.model):
-            return self.session.thresholds
-        return []
+        # 简化的查询逻辑（条件不变时只解析一次，count()与all()共用结果）
+        if self._cached is not None:
+            return self._cached
+        try:
+            fn = self._MODEL_DISPATCH[self.model]
+        except (KeyError, TypeError):
+            fn = self._resolve(self.model)
+            if isinstance(self.model, type):
+                self._MODEL_DISPATCH[self.model] = fn
+        self._cached = match_criteria(fn(self.session), self._criteria) if fn else []
+        return self._cached
     
     def count(self):
         return len(self.all())
@@ -198,11 +405,57 @@ class MockQuery:
         return self
 
 
+class MockAggregateRow:
+    """没有匹配记录时聚合查询返回的行，SUM/AVG等聚合值均为NULL"""
+    
+    def __getattr__(self, name):
+        return None
+
+
+class MockAggregateQuery:
+    """
+    模拟多列/聚合查询
+    模拟数据库不计算聚合值，按没有匹配记录处理：分组查询返回空列表，
+    不分组的聚合查询返回一行NULL值（与SQL的行为一致）
+    """
+    
+    def filter(self, *args):
+        return self
+    
+    def group_by(self, *args):
+        return self
+    
+    def order_by(self, *args):
+        return self
+    
+    def limit(self, n):
+        return self
+    
+    def offset(self, n):
+        return self
+    
+    def all(self):
+        return []
+    
+    def count(self):
+        return 0
+    
+    def first(self):
+        return MockAggregateRow()
+
+
 class MockDatabaseManager:
-    def __init__(self, uri):
+    def __init__(self, uri, **pool_options):
         self.uri = uri
         self.session = MockSession()
     
+    def __copy__(self):
+        # 浅拷贝管理器，但每个副本都持有独立的会话数据
+        clone = object.__new__(MockDatabaseManager)
+        clone.__dict__.update(self.__dict__)
+        clone.session = copy.deepcopy(self.session)
+        return clone
+    
     def connect(self):
         return True
     
@@ -220,16 +473,16 @@ class MockDatabaseManager:
         }
 
 
-@pytest.fixture
+# 模拟数据库原型（模块加载时只构建一次，每个测试使用其副本）
+_DB_PROTOTYPE = MockDatabaseManager('sqlite:///:memory:')
+
+
+@pytest.fixture(scope='session')
 def app():
-    """创建测试应用实例"""
-    # 模拟models模块
-    sys.modules['models'] = MagicMock()
-    sys.modules['models'].User = MockUser
-    sys.modules['models'].EnergyData = MockEnergyData
-    sys.modules['models'].Alarm = MockAlarm
-    sys.modules['models'].Threshold = MockThreshold
-    
+    """
+    创建测试应用实例（整个测试会话只创建一次）
+    每个测试的数据库状态由db fixture重置
+    """
     # 使用测试配置
     class TestConfig:
         TESTING = True
@@ -242,113 +495,198 @@ def app():
         ACCOUNT_LOCK_DURATION = 600
         PERMANENT_SESSION_LIFETIME = 1800
         LOG_LEVEL = 'ERROR'
-        LOG_FILE = 'logs/test_web_app.log'
+        # 并行运行时每个工作进程使用独立的日志文件
+        LOG_FILE = f'logs/test_web_app_{WORKER_ID}.log' if WORKER_ID else 'logs/test_web_app.log'
         CORS_ORIGINS = '*'
     
     # 模拟DatabaseManager
-    with patch('app.DatabaseManager', MockDatabaseManager):
-        from app import create_app
-        app = create_app(TestConfig)
-        app.db_manager = MockDatabaseManager('sqlite:///:memory:')
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(app_module, 'DatabaseManager', lambda uri, **pool_options: copy.copy(_DB_PROTOTYPE))
+        app = app_module.create_app(TestConfig)
     
     yield app
 
 
+@pytest.fixture(autouse=True)
+def db(app):
+    """为每个测试提供全新的模拟数据库"""
+    app.db_manager = copy.copy(_DB_PROTOTYPE)
+    return app.db_manager
+
+
+@pytest.fixture
+def writable_db(db):
+    """为会修改数据的测试提供独立的（非共享）模拟数据"""
+    db.session = MockSession(readonly=False)
+    return db
+
+
 @pytest.fixture
 def client(app):
     """创建测试客户端"""
     return app.test_client()
 
 
+# 预先序列化的登录请求体（内容固定，避免每次登录都重新序列化）
+_ADMIN_LOGIN_BYTES = json.dumps({'username': 'admin', 'password': 'admin123'}).encode()
+_USER_LOGIN_BYTES = json.dumps({'username': 'user', 'password': 'user123'}).encode()
+_ADMIN_WRONG_PASSWORD_BYTES = json.dumps({'username': 'admin', 'password': 'wrongpassword'}).encode()
+_NONEXISTENT_LOGIN_BYTES = json.dumps({'username': 'nonexistent', 'password': 'password'}).encode()
+_EMPTY_LOGIN_BYTES = json.dumps({'username': '', 'password': ''}).encode()
+
+
+def post_login(client, payload):
+    """使用预先序列化的请求体登录"""
+    return client.post('/auth/login', data=payload, content_type='application/json')
+
+
+def login_cookie(app, payload):
+    """
+    使用独立的模拟数据库登录一次并返回会话Cookie的值
+    不受之前测试中账户锁定等状态的影响
+    """
+    db_manager = app.db_manager
+    app.db_manager = copy.copy(_DB_PROTOTYPE)
+    try:
+        client = app.test_client()
+        response = post_login(client, payload)
+        assert response.status_code == 200
+        return client.get_cookie(app.config['SESSION_COOKIE_NAME']).value
+    finally:
+        app.db_manager = db_manager
+
+
+@pytest.fixture(scope='session')
+def admin_cookie(app):
+    """管理员会话Cookie（整个测试会话只登录一次）"""
+    return login_cookie(app, _ADMIN_LOGIN_BYTES)
+
+
+@pytest.fixture(scope='session')
+def user_cookie(app):
+    """普通用户会话Cookie（整个测试会话只登录一次）"""
+    return login_cookie(app, _USER_LOGIN_BYTES)
+
+
 @pytest.fixture
-def admin_session(client):
+def admin_session(app, client, admin_cookie):
     """创建管理员会话"""
-    response = client.post('/auth/login', json={
-        'username': 'admin',
-        'password': 'admin123'
-    })
-    assert response.status_code == 200
+    client.set_cookie(app.config['SESSION_COOKIE_NAME'], admin_cookie)
     return client
 
 
 @pytest.fixture
-def user_session(client):
+def user_session(app, client, user_cookie):
     """创建普通用户会话"""
-    response = client.post('/auth/login', json={
-        'username': 'user',
-        'password': 'user123'
-    })
-    assert response.status_code == 200
+    client.set_cookie(app.config['SESSION_COOKIE_NAME'], user_cookie)
     return client
 
 
+@pytest.fixture(scope='session')
+def get_cache():
+    """幂等GET请求的响应缓存（整个测试会话共享）"""
+    return {}
+
+
+def cached_get(client, url, cache):
+    """执行幂等GET请求，缓存状态码和解析后的JSON"""
+    if url not in cache:
+        response = client.get(url)
+        cache[url] = (response.status_code, response.get_json())
+    return cache[url]
+
+
+@pytest.fixture
+def admin_get(admin_session, get_cache):
+    """以管理员身份执行带缓存的GET请求（只用于只读且只检查结果数据的测试）"""
+    return lambda url: cached_get(admin_session, url, get_cache)
+
+
 # ==================== 认证测试 (需求 8.1) ====================
 
 class TestAuthentication:
     """用户认证测试"""
     
+    @pytest.fixture(autouse=True)
+    def _reset_admin(self, app):
+        """重置管理员的登录失败次数和锁定状态，避免锁定测试影响其他测试"""
+        admin = app.db_manager.session.users['admin']
+        admin.failed_login_attempts = 0
+        admin.locked_until = None
+        yield
+    
     def test_login_success(self, client):
         """测试成功登录"""
-        response = client.post('/auth/login', json={
-            'username': 'admin',
-            'password': 'admin123'
-        })
+        response = post_login(client, _ADMIN_LOGIN_BYTES)
         assert response.status_code == 200
         data = response.get_json()
         assert data['success'] is True
         assert data['user']['username'] == 'admin'
         assert data['user']['role'] == 'admin'
     
+    def test_login_as_user(self, client):
+        """测试普通用户登录（按用户名查找用户，而不是返回第一个用户）"""
+        response = post_login(client, _USER_LOGIN_BYTES)
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['user']['username'] == 'user'
+        assert data['user']['role'] == 'user'
+    
     def test_login_invalid_credentials(self, client):
         """测试无效凭证登录"""
-        response = client.post('/auth/login', json={
-            'username': 'admin',
-            'password': 'wrongpassword'
-        })
+        response = post_login(client, _ADMIN_WRONG_PASSWORD_BYTES)
         assert response.status_code == 401
         data = response.get_json()
         assert data['success'] is False
     
     def test_login_nonexistent_user(self, client):
         """测试不存在的用户登录"""
-        response = client.post('/auth/login', json={
-            'username': 'nonexistent',
-            'password': 'password'
-        })
+        response = post_login(client, _NONEXISTENT_LOGIN_BYTES)
         assert response.status_code == 401
         data = response.get_json()
         assert data['success'] is False
     
     def test_login_empty_credentials(self, client):
         """测试空凭证登录"""
-        response = client.post('/auth/login', json={
-            'username': '',
-            'password': ''
-        })
+        response = post_login(client, _EMPTY_LOGIN_BYTES)
         assert response.status_code == 400
         data = response.get_json()
         assert data['success'] is False
     
+    @pytest.mark.slow
+    @pytest.mark.xdist_group('auth_state')
     def test_login_account_lockout(self, client):
         """测试账户锁定机制 (需求 8.5)"""
         # 连续3次失败登录
         for i in range(3):
-            response = client.post('/auth/login', json={
-                'username': 'admin',
-                'password': 'wrongpassword'
-            })
+            response = post_login(client, _ADMIN_WRONG_PASSWORD_BYTES)
             if i < 2:
                 assert response.status_code == 401
             else:
                 # 第3次失败应该锁定账户
                 assert response.status_code == 403
                 data = response.get_json()
-                assert '锁定' in data['message']
+                assert data['code'] == 'ACCOUNT_LOCKED'
+    
+    def test_locked_account_served_from_cache(self, app, client, monkeypatch, fake_redis):
+        """测试账户锁定后，登录请求由Redis中的登录状态直接拒绝"""
+        monkeypatch.setattr(app, 'redis', fake_redis)
+        
+        for _ in range(3):
+            post_login(client, _ADMIN_WRONG_PASSWORD_BYTES)
+        
+        with patch.object(MockSession, 'query') as query:
+            response = post_login(client, _ADMIN_LOGIN_BYTES)
+        assert response.status_code == 403
+        assert response.get_json()['code'] == 'ACCOUNT_LOCKED'
+        query.assert_not_called()
     
     def test_logout(self, admin_session):
         """测试登出"""
         response = admin_session.post('/auth/logout')
-        assert response.status_code == 200
+        # 非JSON请求登出后重定向到登录页面
+        assert response.status_code == 302
+        assert response.headers['Location'].endswith('/auth/login')
         
         # 验证登出后无法访问受保护资源
         response = admin_session.get('/api/devices')
@@ -361,6 +699,26 @@ class TestAuthentication:
         data = response.get_json()
         assert data['authenticated'] is True
     
+    def test_session_activity_throttled(self, admin_session):
+        """测试会话活动时间在短时间内不重复更新"""
+        admin_session.get('/api/devices')
+        with admin_session.session_transaction() as sess:
+            first_activity = sess['last_activity']
+        
+        admin_session.get('/api/devices')
+        with admin_session.session_transaction() as sess:
+            assert sess['last_activity'] == first_activity
+    
+    def test_check_session_not_modified(self, admin_session):
+        """测试会话未变化时会话检查返回304"""
+        response = admin_session.get('/auth/check')
+        assert response.headers['Cache-Control'] == 'private, max-age=30'
+        
+        response = admin_session.get('/auth/check', headers={
+            'If-None-Match': response.headers['ETag']
+        })
+        assert response.status_code == 304
+    
     def test_check_session_unauthenticated(self, client):
         """测试会话检查 - 未认证"""
         response = client.get('/auth/check')
@@ -371,23 +729,43 @@ class TestAuthentication:
 
 # ==================== 权限控制测试 (需求 8.2, 8.3) ====================
 
+# 需要登录才能访问的只读API端点（每个端点作为独立的测试用例）
+PROTECTED_ENDPOINTS = (
+    '/api/devices',
+    '/api/devices/conveyor/current',
+    '/api/energy/summary',
+    '/api/oee',
+    '/api/alarms',
+    '/api/thresholds'
+)
+
+# GET请求的WSGI环境模板（只构建一次，仅检查状态码的测试复制后修改路径）
+ENV_TEMPLATE = EnvironBuilder(method='GET', path='/').get_environ()
+
+
+def get_status_code(app, endpoint, cookie=None):
+    """
+    基于ENV_TEMPLATE直接分发GET请求并返回状态码
+    跳过测试客户端每次请求重建WSGI环境的开销，只适用于不检查响应头的测试
+    """
+    environ = dict(ENV_TEMPLATE)
+    environ['PATH_INFO'] = endpoint
+    if cookie:
+        environ['HTTP_COOKIE'] = f"{app.config['SESSION_COOKIE_NAME']}={cookie}"
+    
+    with app.request_context(environ):
+        response = app.full_dispatch_request()
+        response.close()
+        return response.status_code
+
+
 class TestAuthorization:
     """权限控制测试"""
     
-    def test_api_requires_login(self, client):
+    @pytest.mark.parametrize('endpoint', PROTECTED_ENDPOINTS)
+    def test_api_requires_login(self, app, endpoint):
         """测试API需要登录"""
-        endpoints = [
-            '/api/devices',
-            '/api/devices/conveyor/current',
-            '/api/energy/summary',
-            '/api/oee',
-            '/api/alarms',
-            '/api/thresholds'
-        ]
-        
-        for endpoint in endpoints:
-            response = client.get(endpoint)
-            assert response.status_code == 401, f"Endpoint {endpoint} should require login"
+        assert get_status_code(app, endpoint) == 401
     
     def test_admin_only_endpoints(self, user_session):
         """测试管理员专用端点 (需求 8.4)"""
@@ -397,7 +775,7 @@ class TestAuthorization:
         })
         assert response.status_code == 403
         data = response.get_json()
-        assert '权限' in data['message']
+        assert data['code'] == 'FORBIDDEN'
         
         response = user_session.post('/api/thresholds', json={
             'device_id': 'test',
@@ -406,7 +784,7 @@ class TestAuthorization:
         })
         assert response.status_code == 403
     
-    def test_admin_can_access_admin_endpoints(self, admin_session):
+    def test_admin_can_access_admin_endpoints(self, admin_session, writable_db):
         """测试管理员可以访问管理员端点"""
         # 管理员可以访问阈值更新端点
         response = admin_session.put('/api/thresholds/1', json={
@@ -415,20 +793,10 @@ class TestAuthorization:
         # 可能返回200或404（如果阈值不存在），但不应该是403
         assert response.status_code != 403
     
-    def test_normal_user_can_view_data(self, user_session):
+    @pytest.mark.parametrize('endpoint', PROTECTED_ENDPOINTS)
+    def test_normal_user_can_view_data(self, app, user_cookie, endpoint):
         """测试普通用户可以查看数据 (需求 8.3)"""
-        endpoints = [
-            '/api/devices',
-            '/api/devices/conveyor/current',
-            '/api/energy/summary',
-            '/api/oee',
-            '/api/alarms',
-            '/api/thresholds'
-        ]
-        
-        for endpoint in endpoints:
-            response = user_session.get(endpoint)
-            assert response.status_code == 200, f"User should be able to view {endpoint}"
+        assert get_status_code(app, endpoint, user_cookie) == 200
 
 
 # ==================== 设备API测试 ====================
@@ -482,6 +850,13 @@ class TestDeviceAPI:
         data = response.get_json()
         assert data['success'] is False
 
+    def test_get_device_history_invalid_page(self, admin_session):
+        """测试无效的分页参数"""
+        response = admin_session.get('/api/devices/conveyor/history?page=abc')
+        assert response.status_code == 400
+        data = response.get_json()
+        assert data['success'] is False
+
 
 # ==================== 能耗API测试 ====================
 
@@ -496,18 +871,16 @@ class TestEnergyAPI:
         assert data['success'] is True
         assert 'summary' in data
     
-    def test_get_energy_summary_with_device_filter(self, admin_session):
+    def test_get_energy_summary_with_device_filter(self, admin_get):
         """测试按设备过滤能耗数据"""
-        response = admin_session.get('/api/energy/summary?device_id=conveyor')
-        assert response.status_code == 200
-        data = response.get_json()
+        status_code, data = admin_get('/api/energy/summary?device_id=conveyor')
+        assert status_code == 200
         assert data['success'] is True
     
-    def test_get_energy_summary_with_aggregate(self, admin_session):
+    def test_get_energy_summary_with_aggregate(self, admin_get):
         """测试能耗聚合查询"""
-        response = admin_session.get('/api/energy/summary?aggregate=avg')
-        assert response.status_code == 200
-        data = response.get_json()
+        status_code, data = admin_get('/api/energy/summary?aggregate=avg')
+        assert status_code == 200
         assert data['success'] is True
     
     def test_get_energy_summary_invalid_aggregate(self, admin_session):
@@ -531,12 +904,11 @@ class TestOEEAPI:
         assert data['success'] is True
         assert 'oee' in data
     
-    def test_get_oee_with_dimension(self, admin_session):
+    def test_get_oee_with_dimension(self, admin_get):
         """测试按维度查询OEE"""
         for dimension in ['day', 'week', 'month']:
-            response = admin_session.get(f'/api/oee?dimension={dimension}')
-            assert response.status_code == 200
-            data = response.get_json()
+            status_code, data = admin_get(f'/api/oee?dimension={dimension}')
+            assert status_code == 200
             assert data['success'] is True
             assert data['oee']['dimension'] == dimension
     
@@ -563,18 +935,16 @@ class TestAlarmAPI:
         assert 'pagination' in data
         assert 'statistics' in data
     
-    def test_get_alarms_with_filters(self, admin_session):
+    def test_get_alarms_with_filters(self, admin_get):
         """测试带过滤条件的报警查询"""
-        response = admin_session.get('/api/alarms?device_id=station1&alarm_level=warning')
-        assert response.status_code == 200
-        data = response.get_json()
+        status_code, data = admin_get('/api/alarms?device_id=station1&alarm_level=warning')
+        assert status_code == 200
         assert data['success'] is True
     
-    def test_get_alarms_acknowledged_filter(self, admin_session):
+    def test_get_alarms_acknowledged_filter(self, admin_get):
         """测试按确认状态过滤报警"""
-        response = admin_session.get('/api/alarms?acknowledged=false')
-        assert response.status_code == 200
-        data = response.get_json()
+        status_code, data = admin_get('/api/alarms?acknowledged=false')
+        assert status_code == 200
         assert data['success'] is True
     
     def test_get_alarms_invalid_level(self, admin_session):
@@ -584,20 +954,20 @@ class TestAlarmAPI:
         data = response.get_json()
         assert data['success'] is False
     
-    def test_acknowledge_alarm(self, admin_session):
+    @pytest.mark.xdist_group('auth_state')
+    def test_acknowledge_alarm(self, admin_session, writable_db):
         """测试确认报警"""
         # 先获取一个未确认的报警
         response = admin_session.get('/api/alarms?acknowledged=false')
-        data = response.get_json()
+        assert response.status_code == 200
+        alarm_id = response.get_json()['alarms'][0]['id']
         
-        if data['alarms']:
-            alarm_id = data['alarms'][0]['id']
-            
-            # 确认报警
-            response = admin_session.post(f'/api/alarms/{alarm_id}/acknowledge')
-            assert response.status_code == 200
-            ack_data = response.get_json()
-            assert ack_data['success'] is True
+        # 确认报警
+        response = admin_session.post(f'/api/alarms/{alarm_id}/acknowledge')
+        assert response.status_code == 200
+        ack_data = response.get_json()
+        assert ack_data['success'] is True
+        assert writable_db.session.alarms[0].acknowledged is True
     
     def test_acknowledge_nonexistent_alarm(self, admin_session):
         """测试确认不存在的报警"""
@@ -620,30 +990,31 @@ class TestThresholdAPI:
         assert data['success'] is True
         assert 'thresholds' in data
     
-    def test_get_thresholds_with_device_filter(self, admin_session):
+    def test_get_thresholds_with_device_filter(self, admin_get):
         """测试按设备过滤阈值"""
-        response = admin_session.get('/api/thresholds?device_id=conveyor')
-        assert response.status_code == 200
-        data = response.get_json()
+        status_code, data = admin_get('/api/thresholds?device_id=conveyor')
+        assert status_code == 200
         assert data['success'] is True
     
-    def test_update_threshold_as_admin(self, admin_session):
+    @pytest.mark.xdist_group('auth_state')
+    def test_update_threshold_as_admin(self, admin_session, writable_db):
         """测试管理员更新阈值"""
         # 先获取一个阈值
         response = admin_session.get('/api/thresholds')
-        data = response.get_json()
+        assert response.status_code == 200
+        threshold_id = response.get_json()['thresholds'][0]['id']
         
-        if data['thresholds']:
-            threshold_id = data['thresholds'][0]['id']
-            
-            # 更新阈值
-            response = admin_session.put(f'/api/thresholds/{threshold_id}', json={
-                'threshold_value': 4.5,
-                'alarm_level': 'critical'
-            })
-            assert response.status_code == 200
-            update_data = response.get_json()
-            assert update_data['success'] is True
+        # 更新阈值
+        response = admin_session.put(f'/api/thresholds/{threshold_id}', json={
+            'threshold_value': 4.5,
+            'alarm_level': 'critical'
+        })
+        assert response.status_code == 200
+        update_data = response.get_json()
+        assert update_data['success'] is True
+        assert update_data['threshold']['threshold_value'] == 4.5
+        assert update_data['threshold']['alarm_level'] == 'critical'
+        assert update_data['threshold']['updated_by'] == 'admin'
     
     def test_update_threshold_as_user(self, user_session):
         """测试普通用户无法更新阈值 (需求 8.3)"""
@@ -652,7 +1023,7 @@ class TestThresholdAPI:
         })
         assert response.status_code == 403
         data = response.get_json()
-        assert '权限' in data['message']
+        assert data['code'] == 'FORBIDDEN'
     
     def test_update_threshold_invalid_value(self, admin_session):
         """测试无效的阈值"""
@@ -711,9 +1082,49 @@ class TestThresholdAPI:
         assert response.status_code == 400
         data = response.get_json()
         assert data['success'] is False
+    
+    def test_create_thresholds_bulk_invalid_entry(self, admin_session):
+        """测试批量创建阈值时报告无效记录的位置"""
+        response = admin_session.post('/api/thresholds', json=[
+            {'device_id': 'test', 'parameter_name': 'power', 'threshold_value': 5.0},
+            {'device_id': 'test', 'parameter_name': 'voltage'}
+        ])
+        assert response.status_code == 400
+        data = response.get_json()
+        assert data['success'] is False
+        assert data['message'].startswith('第 2 条记录')
+
+
+# ==================== 路由注册测试 ====================
+
+# 预期注册的API端点
+EXPECTED_ENDPOINTS = (
+    'api.get_devices',
+    'api.get_device_current',
+    'api.get_device_history',
+    'api.get_energy_summary',
+    'api.get_oee',
+    'api.get_alarms',
+    'api.acknowledge_alarm',
+    'api.get_thresholds',
+    'api.update_threshold',
+    'api.create_threshold'
+)
+
+
+@pytest.fixture(scope='session')
+def registered_endpoints(app):
+    """应用已注册的端点名称集合（整个测试会话只计算一次）"""
+    return frozenset(rule.endpoint for rule in app.url_map.iter_rules())
+
+
+@pytest.mark.parametrize('endpoint', EXPECTED_ENDPOINTS)
+def test_endpoint_registered(registered_endpoints, endpoint):
+    """测试API端点已正确注册"""
+    assert endpoint in registered_endpoints
 
 
 # ==================== 运行测试 ====================
 
 if __name__ == '__main__':
-    pytest.main([__file__, '-v', '--tb=short'])
+    raise SystemExit(pytest.main([__file__, '-v', '--tb=short']))
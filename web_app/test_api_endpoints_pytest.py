@@ -7,343 +7,283 @@ API端点测试 - 使用pytest
 - 8.2: 权限控制测试  
 - 8.3: 角色验证测试
 
-注意: 本测试需要实际的数据库连接。请确保数据库已初始化并包含测试用户。
-运行前请执行: python python_client/init_database.py
+注意: 本测试使用conftest.py中的SQLite测试数据库（每个pytest-xdist工作进程一个临时文件），
+测试用户在会话开始时自动写入，无需预先初始化数据库。
 """
 
 import pytest
-import sys
-import os
-
-# 添加项目路径
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from contextlib import contextmanager
+from datetime import datetime
 
 # 测试配置
 TEST_ADMIN_USER = {'username': 'admin', 'password': 'admin123'}
 TEST_NORMAL_USER = {'username': 'user', 'password': 'user123'}
 
 
-def test_import_app():
-    """测试应用模块可以正常导入"""
-    try:
-        from app import app
-        assert app is not None
-        print("✓ Flask应用导入成功")
-    except Exception as e:
-        pytest.fail(f"应用导入失败: {e}")
+def route_methods(app, rule):
+    """
+    返回URL规则允许的HTTP方法集合
+    
+    Args:
+        app: Flask应用实例
+        rule: URL规则字符串，如 '/auth/login'
+    """
+    return {
+        method
+        for url_rule in app.url_map.iter_rules()
+        if url_rule.rule == rule
+        for method in url_rule.methods
+    }
 
 
-def test_import_routes():
-    """测试路由模块可以正常导入"""
-    try:
-        from routes.auth import auth_bp, login_required, admin_required
-        from routes.api import api_bp
-        assert auth_bp is not None
-        assert api_bp is not None
-        assert login_required is not None
-        assert admin_required is not None
-        print("✓ 路由模块导入成功")
-    except Exception as e:
-        pytest.fail(f"路由模块导入失败: {e}")
+@pytest.fixture
+def mock_threshold_db(app, mocker):
+    """
+    模拟更新阈值时的数据库会话，UPDATE ... RETURNING返回更新后的阈值行
+    返回模拟的会话，测试可以检查执行和提交的调用
+    """
+    db_session = mocker.MagicMock()
+    db_session.get_bind.return_value.dialect.update_returning = True
+    db_session.execute.return_value.mappings.return_value.first.return_value = {
+        'id': 1,
+        'device_id': 'conveyor',
+        'parameter_name': 'power',
+        'threshold_value': 5.0,
+        'alarm_level': 'warning',
+        'enabled': True,
+        'updated_by': TEST_ADMIN_USER['username'],
+        'updated_at': None
+    }
+    
+    @contextmanager
+    def get_session():
+        yield db_session
+    
+    mocker.patch.object(app.db_manager, 'get_session', get_session)
+    return db_session
 
 
+@pytest.mark.usefixtures('mock_user_db')
 class TestAuthenticationEndpoints:
     """认证端点测试 (需求 8.1)"""
     
-    def test_login_endpoint_exists(self):
-        """测试登录端点存在"""
-        from app import app
-        with app.test_client() as client:
-            response = client.get('/auth/login')
-            # 应该返回登录页面或重定向，不应该是404
-            assert response.status_code != 404
-            print("✓ 登录端点存在")
+    def test_login_route_registered(self, app):
+        """测试登录路由已注册（检查URL映射，不发送请求）"""
+        methods = route_methods(app, '/auth/login')
+        assert {'GET', 'POST'} <= methods
     
-    def test_login_with_valid_credentials(self):
-        """测试使用有效凭证登录"""
-        from app import app
-        with app.test_client() as client:
-            response = client.post('/auth/login', json=TEST_ADMIN_USER)
-            # 应该返回200或302（重定向）
-            assert response.status_code in [200, 302]
-            if response.status_code == 200:
-                data = response.get_json()
-                if data:
-                    assert 'success' in data or 'user' in data
-            print("✓ 有效凭证登录测试通过")
+    def test_login_with_valid_credentials(self, client, mock_user_db, mocker):
+        """测试使用有效凭证登录（模拟密码验证，不执行bcrypt）"""
+        verify_password = mocker.patch('routes.auth.verify_password', return_value=True)
+        
+        response = client.post('/auth/login', json=TEST_ADMIN_USER)
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['success'] is True
+        assert data['user']['role'] == 'admin'
+        verify_password.assert_called_once_with(mock_user_db['admin'], TEST_ADMIN_USER['password'])
     
-    def test_login_with_invalid_credentials(self):
+    def test_login_with_invalid_credentials(self, client):
         """测试使用无效凭证登录"""
-        from app import app
-        with app.test_client() as client:
-            response = client.post('/auth/login', json={
-                'username': 'admin',
-                'password': 'wrongpassword'
-            })
-            # 应该返回401（未授权）
-            assert response.status_code == 401
-            print("✓ 无效凭证登录测试通过")
+        response = client.post('/auth/login', json={
+            'username': 'admin',
+            'password': 'wrongpassword'
+        })
+        # 应该返回401（未授权）
+        assert response.status_code == 401
     
-    def test_logout_endpoint(self):
+    def test_logout_endpoint(self, client):
         """测试登出端点"""
-        from app import app
-        with app.test_client() as client:
-            # 先登录
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            # 然后登出
-            response = client.post('/auth/logout')
-            # 应该返回200或302
-            assert response.status_code in [200, 302]
-            print("✓ 登出端点测试通过")
+        # 先登录
+        client.post('/auth/login', json=TEST_ADMIN_USER)
+        # 然后登出
+        response = client.post('/auth/logout')
+        # 应该返回200或302
+        assert response.status_code in [200, 302]
 
 
 class TestAuthorizationEndpoints:
     """权限控制测试 (需求 8.2, 8.3)"""
     
-    def test_api_requires_authentication(self):
+    def test_api_requires_authentication(self, client):
         """测试API端点需要认证"""
-        from app import app
-        with app.test_client() as client:
-            # 未登录访问API
-            response = client.get('/api/devices')
-            # 应该返回401（未授权）
-            assert response.status_code == 401
-            print("✓ API需要认证测试通过")
+        # 未登录访问API
+        response = client.get('/api/devices')
+        # 应该返回401（未授权）
+        assert response.status_code == 401
     
-    def test_authenticated_user_can_access_api(self):
+    def test_authenticated_user_can_access_api(self, admin_client):
         """测试已认证用户可以访问API"""
-        from app import app
-        with app.test_client() as client:
-            # 登录
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            # 访问API
-            response = client.get('/api/devices')
-            # 应该返回200
-            assert response.status_code == 200
-            print("✓ 已认证用户访问API测试通过")
+        # 访问API
+        response = admin_client.get('/api/devices')
+        # 应该返回200
+        assert response.status_code == 200
     
-    def test_normal_user_cannot_update_thresholds(self):
+    def test_normal_user_cannot_update_thresholds(self, user_client):
         """测试普通用户无法更新阈值 (需求 8.3)"""
-        from app import app
-        with app.test_client() as client:
-            # 使用普通用户登录
-            client.post('/auth/login', json=TEST_NORMAL_USER)
-            # 尝试更新阈值
-            response = client.put('/api/thresholds/1', json={
-                'threshold_value': 5.0
-            })
-            # 应该返回403（禁止访问）
-            assert response.status_code == 403
-            print("✓ 普通用户权限限制测试通过")
+        # 尝试更新阈值
+        response = user_client.put('/api/thresholds/1', json={
+            'threshold_value': 5.0
+        })
+        # 应该返回403（禁止访问）
+        assert response.status_code == 403
     
-    def test_admin_can_update_thresholds(self):
+    def test_admin_can_update_thresholds(self, admin_client, mock_threshold_db):
         """测试管理员可以更新阈值 (需求 8.4)"""
-        from app import app
-        with app.test_client() as client:
-            # 使用管理员登录
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            # 尝试更新阈值
-            response = client.put('/api/thresholds/1', json={
-                'threshold_value': 5.0
-            })
-            # 应该不是403（可能是200、404或400，但不应该是权限错误）
-            assert response.status_code != 403
-            print("✓ 管理员权限测试通过")
-
-
-class TestDeviceAPIEndpoints:
-    """设备API端点测试"""
-    
-    def test_get_devices(self):
-        """测试获取设备列表"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/devices')
-            assert response.status_code == 200
-            data = response.get_json()
-            assert 'devices' in data or 'success' in data
-            print("✓ 获取设备列表测试通过")
-    
-    def test_get_device_current(self):
-        """测试获取设备当前数据"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/devices/conveyor/current')
-            assert response.status_code == 200
-            print("✓ 获取设备当前数据测试通过")
-    
-    def test_get_device_history(self):
-        """测试获取设备历史数据"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/devices/conveyor/history')
-            assert response.status_code == 200
-            print("✓ 获取设备历史数据测试通过")
-
-
-class TestEnergyAPIEndpoints:
-    """能耗API端点测试"""
+        response = admin_client.put('/api/thresholds/1', json={
+            'threshold_value': 5.0
+        })
+        
+        assert response.status_code == 200
+        assert response.get_json()['threshold']['threshold_value'] == 5.0
+        mock_threshold_db.execute.assert_called_once()
+        mock_threshold_db.commit.assert_called_once_with()
     
-    def test_get_energy_summary(self):
-        """测试获取能耗汇总"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/energy/summary')
-            assert response.status_code == 200
-            print("✓ 获取能耗汇总测试通过")
+    @pytest.mark.integration
+    def test_admin_update_threshold_end_to_end(self, admin_client):
+        """测试管理员创建并更新阈值（访问真实数据库）"""
+        response = admin_client.post('/api/thresholds', json={
+            'device_id': 'e2e_device',
+            'parameter_name': 'power',
+            'threshold_value': 3.0
+        })
+        assert response.status_code == 201
+        threshold_id = response.get_json()['threshold']['id']
+        
+        response = admin_client.put(f'/api/thresholds/{threshold_id}', json={
+            'threshold_value': 5.0
+        })
+        assert response.status_code == 200
+        assert response.get_json()['threshold']['threshold_value'] == 5.0
+
+
+# 管理员权限矩阵: (URL, 期望的状态码)
+# OEE端点由TestOEEAPIEndpoints按维度单独测试
+ADMIN_PERMISSION_MATRIX = (
+    ('/api/devices', 200),
+    ('/api/devices/conveyor/current', 200),
+    ('/api/devices/conveyor/history', 200),
+    ('/api/energy/summary', 200),
+    ('/api/alarms', 200),
+    ('/api/alarms?alarm_level=warning', 200),
+    ('/api/thresholds', 200),
+)
+
+
+def test_admin_permission_matrix(admin_client):
+    """测试管理员依次访问各查询端点（复用同一个已登录的客户端）"""
+    status_codes = {url: admin_client.get(url).status_code for url, _ in ADMIN_PERMISSION_MATRIX}
+    mismatches = {
+        url: status_codes[url]
+        for url, expected in ADMIN_PERMISSION_MATRIX
+        if status_codes[url] != expected
+    }
+    assert not mismatches
+
+
+# OEE分组测试使用的生产数据时间（2024-01-01为周一，属于第01周）
+OEE_PERIOD_RANGE = 'start_time=2024-01-01T00:00:00&end_time=2024-01-31T23:59:59'
+
+
+@pytest.fixture(scope='module')
+def oee_production_data(app):
+    """写入一条OEE分组测试使用的生产数据"""
+    from models import ProductionData
     
-    def test_get_energy_summary_with_invalid_aggregate(self):
-        """测试无效的聚合类型"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/energy/summary?aggregate=invalid')
-            assert response.status_code == 400
-            print("✓ 无效聚合类型验证测试通过")
+    with app.db_manager.get_session() as db_session:
+        # SQLite不会为BIGINT主键自动生成值，显式指定ID
+        db_session.add(ProductionData(
+            id=1,
+            timestamp=datetime(2024, 1, 3, 8, 0, 0),
+            product_count=100,
+            reject_count=2,
+            runtime_seconds=3600,
+            downtime_seconds=0,
+            oee_percentage=85.0,
+            availability=95.0,
+            performance=90.0,
+            quality=98.0
+        ))
 
 
 class TestOEEAPIEndpoints:
     """OEE API端点测试"""
     
-    def test_get_oee(self):
-        """测试获取OEE数据"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/oee')
-            assert response.status_code == 200
-            print("✓ 获取OEE数据测试通过")
+    @pytest.mark.parametrize('dimension', [None, 'day', 'week', 'month'])
+    def test_get_oee_with_dimension(self, admin_client, dimension):
+        """测试按维度查询OEE（None为默认维度）"""
+        url = '/api/oee' if dimension is None else f'/api/oee?dimension={dimension}'
+        response = admin_client.get(url)
+        assert response.status_code == 200
     
-    def test_get_oee_with_dimension(self):
-        """测试按维度查询OEE"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            for dimension in ['day', 'week', 'month']:
-                response = client.get(f'/api/oee?dimension={dimension}')
-                assert response.status_code == 200
-            print("✓ OEE维度查询测试通过")
-    
-    def test_get_oee_with_invalid_dimension(self):
-        """测试无效的统计维度"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/oee?dimension=invalid')
-            assert response.status_code == 400
-            print("✓ 无效维度验证测试通过")
+    @pytest.mark.parametrize('dimension, period', [
+        ('day', '2024-01-03'),
+        ('week', '2024-01'),
+        ('month', '2024-01'),
+    ])
+    def test_get_oee_period(self, admin_client, oee_production_data, dimension, period):
+        """测试OEE按维度分组的周期格式（SQLite使用strftime分组）"""
+        response = admin_client.get(f'/api/oee?dimension={dimension}&{OEE_PERIOD_RANGE}')
+        
+        assert response.status_code == 200
+        data = response.get_json()['oee']['data']
+        assert [row['period'] for row in data] == [period]
+        assert data[0]['total_products'] == 100
 
 
 class TestAlarmAPIEndpoints:
     """报警API端点测试"""
     
-    def test_get_alarms(self):
-        """测试获取报警列表"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/alarms')
-            assert response.status_code == 200
-            print("✓ 获取报警列表测试通过")
-    
-    def test_get_alarms_with_filters(self):
-        """测试带过滤条件的报警查询"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/alarms?alarm_level=warning')
-            assert response.status_code == 200
-            print("✓ 报警过滤查询测试通过")
-    
-    def test_get_alarms_with_invalid_level(self):
-        """测试无效的报警级别"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/alarms?alarm_level=invalid')
-            assert response.status_code == 400
-            print("✓ 无效报警级别验证测试通过")
-    
-    def test_acknowledge_alarm_endpoint(self):
-        """测试确认报警端点"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            # 尝试确认一个报警（可能不存在，但端点应该存在）
-            response = client.post('/api/alarms/1/acknowledge')
-            # 应该返回200或404，不应该是405（方法不允许）
-            assert response.status_code != 405
-            print("✓ 确认报警端点测试通过")
+    def test_acknowledge_alarm_route_registered(self, app):
+        """测试确认报警路由支持POST（检查URL映射，不需要登录和数据库）"""
+        methods = route_methods(app, '/api/alarms/<int:alarm_id>/acknowledge')
+        assert 'POST' in methods
 
 
 class TestThresholdAPIEndpoints:
     """阈值API端点测试"""
     
-    def test_get_thresholds(self):
-        """测试获取阈值配置"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.get('/api/thresholds')
-            assert response.status_code == 200
-            print("✓ 获取阈值配置测试通过")
-    
-    def test_update_threshold_missing_value(self):
+    def test_update_threshold_missing_value(self, admin_client):
         """测试更新阈值缺少必需字段"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.put('/api/thresholds/1', json={})
-            assert response.status_code == 400
-            print("✓ 阈值必需字段验证测试通过")
+        response = admin_client.put('/api/thresholds/1', json={})
+        assert response.status_code == 400
     
-    def test_update_threshold_invalid_value(self):
-        """测试更新阈值使用无效值"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.put('/api/thresholds/1', json={
-                'threshold_value': -1.0
-            })
-            assert response.status_code == 400
-            print("✓ 阈值数值验证测试通过")
-    
-    def test_create_threshold_missing_fields(self):
+    def test_create_threshold_missing_fields(self, admin_client):
         """测试创建阈值缺少必需字段"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.post('/api/thresholds', json={
-                'device_id': 'test'
-            })
-            assert response.status_code == 400
-            print("✓ 创建阈值必需字段验证测试通过")
+        response = admin_client.post('/api/thresholds', json={
+            'device_id': 'test'
+        })
+        assert response.status_code == 400
+
+
+# 参数校验失败应返回400的请求: (请求方法, URL, JSON请求体)
+INVALID_REQUESTS = [
+    pytest.param('GET', '/api/energy/summary?aggregate=invalid', None, id='energy-invalid-aggregate'),
+    pytest.param('GET', '/api/oee?dimension=invalid', None, id='oee-invalid-dimension'),
+    pytest.param('GET', '/api/alarms?alarm_level=invalid', None, id='alarms-invalid-level'),
+    pytest.param('POST', '/api/thresholds', {
+        'device_id': 'test',
+        'parameter_name': 'power',
+        'threshold_value': 5.0,
+        'alarm_level': 'invalid'
+    }, id='create-threshold-invalid-level'),
+    pytest.param('PUT', '/api/thresholds/1', {
+        'threshold_value': -1.0
+    }, id='update-threshold-invalid-value'),
+]
+
+
+class TestValidationEndpoints:
+    """参数校验测试"""
     
-    def test_create_threshold_invalid_level(self):
-        """测试创建阈值使用无效的报警级别"""
-        from app import app
-        with app.test_client() as client:
-            client.post('/auth/login', json=TEST_ADMIN_USER)
-            response = client.post('/api/thresholds', json={
-                'device_id': 'test',
-                'parameter_name': 'power',
-                'threshold_value': 5.0,
-                'alarm_level': 'invalid'
-            })
-            assert response.status_code == 400
-            print("✓ 报警级别验证测试通过")
+    @pytest.mark.parametrize('method, url, payload', INVALID_REQUESTS)
+    def test_invalid_request(self, admin_client, method, url, payload):
+        """测试无效参数返回400"""
+        response = admin_client.open(url, method=method, json=payload)
+        assert response.status_code == 400
 
 
 # 运行所有测试
 if __name__ == '__main__':
-    print("=" * 70)
-    print("API端点综合测试")
-    print("=" * 70)
-    print("\n注意: 本测试需要实际的数据库连接和测试用户")
-    print("请确保已运行: python python_client/init_database.py\n")
-    
-    pytest.main([__file__, '-v', '--tb=short', '-s'])
+    raise SystemExit(pytest.main([__file__, '-v']))
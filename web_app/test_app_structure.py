@@ -1,137 +1,112 @@
 """
-Flask应用结构测试脚本
+Flask应用结构测试
 验证应用能够正确初始化和导入所有模块
+
+模块导入只在test_imports中检查一次，之后依赖sys.modules缓存；
+应用使用conftest.py中整个测试会话共享的app fixture，不再单独调用create_app()
 """
 
-import sys
-import os
+import pytest
+
+
+@pytest.fixture(scope='module')
+def auth_decorators():
+    """认证装饰器（本模块只导入一次）"""
+    from routes.auth import login_required, admin_required, role_required
+    return login_required, admin_required, role_required
 
-# 设置输出编码为UTF-8
-if sys.platform == 'win32':
-    import codecs
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
-    sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
 def test_imports():
     """测试所有模块能否正确导入"""
-    print("测试模块导入...")
-    
-    try:
-        import config
-        print("✓ 配置模块导入成功")
-    except Exception as e:
-        print(f"✗ 配置模块导入失败: {e}")
-        return False
-    
-    try:
-        from routes.auth import auth_bp, login_required, admin_required
-        print("✓ 认证路由模块导入成功")
-    except Exception as e:
-        print(f"✗ 认证路由模块导入失败: {e}")
-        return False
-    
-    try:
-        from routes.dashboard import dashboard_bp
-        print("✓ 仪表盘路由模块导入成功")
-    except Exception as e:
-        print(f"✗ 仪表盘路由模块导入失败: {e}")
-        return False
+    import config
+    from routes.auth import auth_bp, login_required, admin_required
+    from routes.dashboard import dashboard_bp
+    from routes.api import api_bp
     
-    try:
-        from routes.api import api_bp
-        print("✓ API路由模块导入成功")
-    except Exception as e:
-        print(f"✗ API路由模块导入失败: {e}")
-        return False
-    
-    return True
+    assert config is not None
+    assert auth_bp is not None
+    assert dashboard_bp is not None
+    assert api_bp is not None
 
 
-def test_app_creation():
+def test_app_creation(app):
     """测试Flask应用能否正确创建"""
-    print("\n测试Flask应用创建...")
+    # 检查蓝图注册
+    expected_blueprints = ['auth', 'dashboard', 'api']
+    for bp in expected_blueprints:
+        assert bp in app.blueprints, f"蓝图 '{bp}' 未注册"
     
-    try:
-        from app import create_app
-        app = create_app()
-        print("✓ Flask应用创建成功")
-        
-        # 检查蓝图注册
-        blueprints = list(app.blueprints.keys())
-        print(f"  已注册的蓝图: {', '.join(blueprints)}")
-        
-        expected_blueprints = ['auth', 'dashboard', 'api']
-        for bp in expected_blueprints:
-            if bp in blueprints:
-                print(f"  ✓ 蓝图 '{bp}' 已注册")
-            else:
-                print(f"  ✗ 蓝图 '{bp}' 未注册")
-                return False
-        
-        # 检查路由
-        print("\n  已注册的路由:")
-        for rule in app.url_map.iter_rules():
-            print(f"    {rule.endpoint}: {rule.rule} [{', '.join(rule.methods - {'HEAD', 'OPTIONS'})}]")
-        
-        return True
-        
-    except Exception as e:
-        print(f"✗ Flask应用创建失败: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+    # 检查路由
+    assert any(rule.rule == '/auth/login' for rule in app.url_map.iter_rules())
 
 
-def test_decorators():
+def test_decorators(auth_decorators):
     """测试装饰器功能"""
-    print("\n测试装饰器...")
+    login_required, admin_required, role_required = auth_decorators
     
-    try:
-        from routes.auth import login_required, admin_required, role_required
-        print("✓ 装饰器导入成功")
-        
-        # 测试装饰器可以应用到函数
-        @login_required
-        def test_func1():
-            return "test"
-        
-        @admin_required
-        def test_func2():
-            return "test"
-        
-        @role_required('manager')
-        def test_func3():
-            return "test"
-        
-        print("✓ 装饰器可以正常应用")
-        return True
-        
-    except Exception as e:
-        print(f"✗ 装饰器测试失败: {e}")
-        return False
+    # 测试装饰器可以应用到函数
+    @login_required
+    def test_func1():
+        return "test"
+    
+    @admin_required
+    def test_func2():
+        return "test"
+    
+    @role_required('manager')
+    def test_func3():
+        return "test"
+    
+    assert test_func1.requires_login is True
+    assert test_func2.required_role == 'admin'
+    assert test_func3.required_role == 'manager'
 
 
-if __name__ == '__main__':
-    print("=" * 60)
-    print("Flask Web应用基础框架测试")
-    print("=" * 60)
+def test_page_cache_per_app(tmp_path):
+    """测试每个应用使用独立的页面缓存，渲染结果不会跨应用复用"""
+    print("\n测试页面缓存...")
     
-    all_passed = True
+    from flask import Flask
+    from routes.dashboard import dashboard_bp
     
-    # 运行测试
-    if not test_imports():
-        all_passed = False
+    pages = []
+    for name in ('first', 'second'):
+        template_dir = tmp_path / name
+        template_dir.mkdir()
+        (template_dir / 'dashboard.html').write_text(name, encoding='utf-8')
+        
+        page_app = Flask(__name__, template_folder=str(template_dir))
+        page_app.register_blueprint(dashboard_bp)
+        pages.append(page_app.test_client().get('/').get_data(as_text=True))
+    
+    assert pages == ['first', 'second']
+    print("✓ 每个应用使用独立的页面缓存")
+
+
+def test_password_pool_lazy(monkeypatch):
+    """测试密码验证进程池默认关闭，启用时首次使用才创建并注册退出时的关闭处理"""
+    print("\n测试密码验证进程池...")
+    
+    from flask import Flask
+    from routes import auth
     
-    if not test_app_creation():
-        all_passed = False
+    registered = []
+    monkeypatch.setattr(auth.atexit, 'register', registered.append)
     
-    if not test_decorators():
-        all_passed = False
+    pool_app = Flask(__name__)
+    assert auth.get_password_pool(pool_app) is None
+    assert registered == []
     
-    print("\n" + "=" * 60)
-    if all_passed:
-        print("✓ 所有测试通过！")
-        print("Flask Web应用基础框架已成功实现")
-    else:
-        print("✗ 部分测试失败")
-    print("=" * 60)
+    pool_app.config['PASSWORD_CHECK_WORKERS'] = 1
+    assert auth.PASSWORD_POOL_EXTENSION not in pool_app.extensions
+    pool = auth.get_password_pool(pool_app)
+    try:
+        assert auth.get_password_pool(pool_app) is pool
+        assert registered == [pool.shutdown]
+    finally:
+        pool.shutdown()
+    print("✓ 密码验证进程池按需创建")
+
+
+if __name__ == '__main__':
+    raise SystemExit(pytest.main([__file__, '-v']))
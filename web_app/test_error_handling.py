@@ -3,15 +3,20 @@
 """
 
 import os
-import sys
 import json
+import functools
 import tempfile
 import pytest
-
-# 添加python_client到路径
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'python_client'))
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app import create_app
+from models import Threshold
+
+# pytest-xdist工作进程ID，串行运行时视为gw0
+WORKER_ID = os.environ.get('PYTEST_XDIST_WORKER', 'gw0')
 
 
 class TestConfig:
@@ -22,23 +27,122 @@ class TestConfig:
     DB_TYPE = 'sqlite'
     SQLITE_DB_PATH = ':memory:'
     LOG_LEVEL = 'DEBUG'
-    LOG_FILE = os.path.join(tempfile.gettempdir(), 'test_web_app.log')
+    LOG_FILE = os.path.join(tempfile.gettempdir(), f'test_web_app_{WORKER_ID}.log')  # 每个工作进程独立的日志文件
     LOG_MAX_BYTES = 1048576
     LOG_BACKUP_COUNT = 3
+    # 内存数据库只保留一个连接，使数据在整个测试会话中共享
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'poolclass': StaticPool,
+        'connect_args': {'check_same_thread': False}
+    }
     
     @property
     def SQLALCHEMY_DATABASE_URI(self):
         return 'sqlite:///:memory:'
 
 
-@pytest.fixture
-def client():
-    """创建测试客户端"""
-    app = create_app(TestConfig)
+@functools.lru_cache(maxsize=4)
+def _make_app(cfg_cls):
+    """
+    按配置类缓存创建的测试应用，同一配置类只创建一次
+    （缓存键为配置类本身，不同配置不会共用同一个应用）
+    """
+    app = create_app(cfg_cls)
     app.config['TESTING'] = True
+    enable_sqlite_savepoints(app.db_manager.engine)
+    # 重建连接后内存数据库为空，在新连接上创建数据表
+    assert app.db_manager.create_tables()
+    return app
+
+
+@pytest.fixture(scope='session')
+def app():
+    """创建测试应用（整个测试会话只创建一次）"""
+    return _make_app(TestConfig)
+
+
+def enable_sqlite_savepoints(engine):
+    """
+    让pysqlite由SQLAlchemy显式发出BEGIN，使外层事务和SAVEPOINT可以正确回滚
+    （SQLAlchemy文档中pysqlite可序列化隔离/SAVEPOINT的处理方式）
+    """
+    @event.listens_for(engine, 'connect')
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
     
-    with app.test_client() as client:
-        yield client
+    @event.listens_for(engine, 'begin')
+    def do_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+    
+    # 重建StaticPool中已存在的连接，使新的连接设置生效
+    engine.dispose()
+
+
+@pytest.fixture(scope='session')
+def client(app):
+    """创建测试客户端（整个测试会话共享）"""
+    return app.test_client()
+
+
+@contextmanager
+def rollback_transaction(db_manager):
+    """
+    在外层事务中运行，结束时回滚
+    应用的数据库会话加入该事务，提交操作只释放SAVEPOINT
+    """
+    connection = db_manager.engine.connect()
+    transaction = connection.begin()
+    original_session = db_manager.Session
+    db_manager.Session = scoped_session(sessionmaker(
+        bind=connection,
+        join_transaction_mode='create_savepoint'
+    ))
+    try:
+        yield db_manager.Session
+    finally:
+        db_manager.Session.remove()
+        db_manager.Session = original_session
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture
+def db_session(app):
+    """写数据库的测试使用：测试在独立的事务中运行，测试结束后回滚"""
+    with rollback_transaction(app.db_manager) as session:
+        yield session
+
+
+def count_thresholds(db_manager, device_id):
+    """查询指定设备的阈值数量"""
+    with db_manager.get_session() as session:
+        return session.query(Threshold).filter(Threshold.device_id == device_id).count()
+
+
+def add_threshold(db_manager, device_id):
+    """通过应用的会话写入一条阈值（get_session退出时提交）"""
+    with db_manager.get_session() as session:
+        session.add(Threshold(
+            device_id=device_id,
+            parameter_name='power',
+            threshold_value=5.0,
+            alarm_level='warning'
+        ))
+
+
+def test_db_session_commit_visible(app, db_session):
+    """测试事务内应用提交的数据对后续查询可见"""
+    add_threshold(app.db_manager, 'rollback_device')
+    assert count_thresholds(app.db_manager, 'rollback_device') == 1
+
+
+def test_db_session_rolled_back(app):
+    """测试应用提交的数据在外层事务结束时回滚"""
+    with rollback_transaction(app.db_manager):
+        add_threshold(app.db_manager, 'rollback_device')
+        assert count_thresholds(app.db_manager, 'rollback_device') == 1
+    
+    assert count_thresholds(app.db_manager, 'rollback_device') == 0
 
 
 def test_404_error_page(client):
@@ -68,10 +172,8 @@ def test_405_error_api(client):
     assert response.status_code in [404, 405]  # 可能是404或405
 
 
-def test_logging_configuration():
+def test_logging_configuration(app):
     """测试日志配置"""
-    app = create_app(TestConfig)
-    
     # 验证日志器已配置
     assert len(app.logger.handlers) > 0
     
@@ -99,4 +201,4 @@ def test_error_handler_with_exception(client):
 
 
 if __name__ == '__main__':
-    pytest.main([__file__, '-v'])
+    raise SystemExit(pytest.main([__file__, '-v']))
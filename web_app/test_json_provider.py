@@ -0,0 +1,53 @@
+"""
+JSON序列化测试
+验证ORJSONProvider的输出与Flask默认实现一致
+"""
+
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+
+from json_provider import ORJSONProvider
+
+pytest.importorskip('orjson')
+
+
+PAYLOAD = {
+    'success': True,
+    'message': '阈值已创建',
+    'threshold_value': Decimal('12.50'),
+    'updated_at': datetime(2024, 1, 15, 8, 30, 0),
+    'items': [{'b': 2, 'a': 1}]
+}
+
+
+@pytest.fixture
+def app():
+    """创建使用ORJSONProvider的最小应用"""
+    app = Flask(__name__)
+    app.json = ORJSONProvider(app)
+    
+    @app.route('/payload')
+    def payload():
+        return jsonify(PAYLOAD)
+    
+    return app
+
+
+def test_output_matches_default_provider(app):
+    """解析后的结果与默认实现一致"""
+    default = DefaultJSONProvider(app)
+    
+    response = app.test_client().get('/payload')
+    assert response.status_code == 200
+    assert response.content_type == 'application/json'
+    assert response.get_json() == default.loads(default.dumps(PAYLOAD))
+
+
+def test_loads_request_body(app):
+    """请求体通过orjson解析"""
+    with app.test_request_context('/', method='POST', json={'device_id': 'PM001'}):
+        assert request.get_json() == {'device_id': 'PM001'}
@@ -0,0 +1,118 @@
+"""
+响应缓存测试
+使用conftest.py中的内存FakeRedis验证缓存命中、失效和过期回退逻辑
+"""
+
+import pytest
+from flask import Flask, jsonify
+
+from routes.cache import cached, invalidate_cache
+
+
+@pytest.fixture
+def app(fake_redis):
+    """创建带缓存视图的最小应用"""
+    app = Flask(__name__)
+    app.redis = fake_redis
+    app.calls = 0
+    app.fail = False
+    
+    @app.route('/items')
+    @cached(ttl=15, key_fn=lambda: 'items:all')
+    def items():
+        app.calls += 1
+        if app.fail:
+            return jsonify({'success': False}), 500
+        return jsonify({'success': True, 'calls': app.calls}), 200
+    
+    @app.route('/stream')
+    @cached(ttl=15, key_fn=lambda: 'items:stream')
+    def stream():
+        app.calls += 1
+        chunks = (b'{"success":true,', f'"calls":{app.calls}}}'.encode('utf-8'))
+        return app.response_class(iter(chunks), mimetype='application/json')
+    
+    @app.route('/items', methods=['POST'])
+    def create_item():
+        invalidate_cache('items:*')
+        return jsonify({'success': True}), 201
+    
+    return app
+
+
+def test_cache_hit(app):
+    """第二次请求直接返回缓存"""
+    client = app.test_client()
+    
+    first = client.get('/items')
+    assert first.headers['X-Cache'] == 'MISS'
+    
+    second = client.get('/items')
+    assert second.status_code == 200
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.content_type == 'application/json'
+    assert second.get_json() == first.get_json()
+    assert app.calls == 1
+
+
+def test_cache_invalidation(app):
+    """写操作后缓存失效"""
+    client = app.test_client()
+    client.get('/items')
+    
+    client.post('/items')
+    
+    response = client.get('/items')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json()['calls'] == 2
+
+
+def test_stale_fallback(app):
+    """视图返回5xx时回退到过期缓存"""
+    client = app.test_client()
+    client.get('/items')
+    app.redis.delete('items:all')
+    app.fail = True
+    
+    response = client.get('/items')
+    assert response.status_code == 200
+    assert response.headers['X-Cache'] == 'STALE'
+    assert response.get_json()['calls'] == 1
+
+
+def test_cache_disabled_without_redis(app):
+    """未配置Redis时直接执行视图"""
+    app.redis = None
+    client = app.test_client()
+    
+    client.get('/items')
+    response = client.get('/items')
+    assert 'X-Cache' not in response.headers
+    assert app.calls == 2
+
+
+def test_streamed_response_cached(app):
+    """流式响应保持流式输出，完整输出后写入缓存"""
+    client = app.test_client()
+    
+    first = client.get('/stream')
+    assert first.is_streamed
+    assert first.headers['X-Cache'] == 'MISS'
+    assert first.get_json() == {'success': True, 'calls': 1}
+    
+    second = client.get('/stream')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+    assert app.calls == 1
+
+
+def test_incomplete_stream_not_cached(app):
+    """客户端未读完流式响应时不写入缓存"""
+    client = app.test_client()
+    
+    response = client.get('/stream', buffered=False)
+    response.close()
+    assert 'items:stream' not in app.redis.store
+    
+    response = client.get('/stream')
+    assert response.headers['X-Cache'] == 'MISS'
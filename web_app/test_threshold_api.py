@@ -0,0 +1,111 @@
+"""
+阈值API查询数量测试
+使用conftest.py中的SQLite测试数据库，统计请求执行的SQL语句数量，防止N+1查询
+"""
+
+import pytest
+from sqlalchemy import event
+
+# 查询数量测试使用的阈值: 设备ID和参数名称列表
+QUERY_COUNT_DEVICE = 'query_count_device'
+QUERY_COUNT_PARAMETERS = ('power', 'voltage', 'current')
+
+
+@pytest.fixture(scope='module')
+def query_count_thresholds(app):
+    """写入查询数量测试使用的阈值"""
+    from models import Threshold
+    
+    with app.db_manager.get_session() as db_session:
+        for name in QUERY_COUNT_PARAMETERS:
+            db_session.add(Threshold(
+                device_id=QUERY_COUNT_DEVICE,
+                parameter_name=name,
+                threshold_value=5.0,
+                alarm_level='warning'
+            ))
+
+
+@pytest.fixture
+def count_queries(app):
+    """
+    记录测试期间执行的SQL语句
+    返回语句列表，用于断言请求执行的查询数量
+    """
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    engine = app.db_manager.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def threshold_ids(admin_client):
+    """查询测试阈值的ID列表"""
+    response = admin_client.get(f'/api/thresholds?device_id={QUERY_COUNT_DEVICE}')
+    return [threshold['id'] for threshold in response.get_json()['thresholds']]
+
+
+def test_list_thresholds_single_query(admin_client, query_count_thresholds, count_queries):
+    """测试阈值列表只执行一条查询，与阈值数量无关"""
+    response = admin_client.get(f'/api/thresholds?device_id={QUERY_COUNT_DEVICE}')
+    
+    assert response.status_code == 200
+    assert response.get_json()['total'] == len(QUERY_COUNT_PARAMETERS)
+    assert len(count_queries) == 1
+
+
+def test_list_thresholds_streamed(admin_client, query_count_thresholds):
+    """测试阈值列表以流式响应输出，拼接后为完整的JSON"""
+    response = admin_client.get(f'/api/thresholds?device_id={QUERY_COUNT_DEVICE}')
+    
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/json'
+    data = response.get_json()
+    assert data['total'] == len(data['thresholds']) == len(QUERY_COUNT_PARAMETERS)
+    assert {threshold['parameter_name'] for threshold in data['thresholds']} == set(QUERY_COUNT_PARAMETERS)
+
+
+def test_list_thresholds_streamed_and_cached(app, admin_client, query_count_thresholds, count_queries, monkeypatch, fake_redis):
+    """测试启用Redis时阈值列表仍然流式输出，完整输出后写入缓存"""
+    monkeypatch.setattr(app, 'redis', fake_redis)
+    
+    first = admin_client.get('/api/thresholds')
+    assert first.is_streamed
+    assert first.headers['X-Cache'] == 'MISS'
+    # 读完流式响应体后才写入缓存
+    first_data = first.get_json()
+    del count_queries[:]
+    
+    second = admin_client.get('/api/thresholds')
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first_data
+    assert count_queries == []
+
+
+def test_update_threshold_single_query(admin_client, query_count_thresholds, count_queries):
+    """测试更新阈值只执行一条UPDATE ... RETURNING，不额外加载关联数据"""
+    threshold_id = threshold_ids(admin_client)[0]
+    del count_queries[:]
+    
+    response = admin_client.put(f'/api/thresholds/{threshold_id}', json={
+        'threshold_value': 6.0
+    })
+    
+    assert response.status_code == 200
+    assert response.get_json()['threshold']['threshold_value'] == 6.0
+    assert len(count_queries) == 1
+
+
+def test_update_nonexistent_threshold(admin_client):
+    """测试更新不存在的阈值返回404"""
+    response = admin_client.put('/api/thresholds/99999', json={
+        'threshold_value': 4.5
+    })
+    
+    assert response.status_code == 404
+    assert response.get_json()['success'] is False